@@ -2,14 +2,47 @@ from .normalising import NormalIsing
 from .graphising import GraphIsing
 from .directedgraphising import DirectedGraphIsing
 from .dualgraphising import DualGraphIsing
-from .studentgraph import StudentGraph
+from .nfoldway import NFoldWay
+from .wanglandau import WangLandau
+from .observables import (adjacency_matrix,
+                          spin_vector,
+                          local_fields,
+                          graph_energy,
+                          lattice_energy)
 from .utils import (compute_properties,
-                    plot_properties,
-                    compute_critical_exponents,
                     get_members_of_association,
                     iterations_to_threshold)
+from .instrumentation import Instrumentation
+from .checkpoint import Checkpoint
+from .hysteresis import hysteresis, hysteresis_loop
+from .screening import influencer_candidates, screen_influencers
+from .reweighting import (single_histogram,
+                          multi_histogram,
+                          free_energies,
+                          binder_crossing,
+                          peak_scaling,
+                          scaling_collapse)
 from .cachefile import CacheFile
-from .gifcache import GifCache  
+from .gifcache import GifCache
+
+# Plotting, CSV ingestion and fitting pull in heavy dependencies
+# (matplotlib, pandas, plotly, scipy.optimize): they are imported on first use.
+_LAZY = {
+    "StudentGraph": ".studentgraph",
+    "plot_properties": ".plotting",
+    "compute_critical_exponents": ".fitting",
+    "bootstrap_critical_exponents": ".fitting",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        import importlib
+        value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     "NormalIsing",
@@ -17,11 +50,31 @@ __all__ = [
     "DirectedGraphIsing",
     "StudentGraph",
     "DualGraphIsing",
+    "NFoldWay",
+    "WangLandau",
+    "adjacency_matrix",
+    "spin_vector",
+    "local_fields",
+    "graph_energy",
+    "lattice_energy",
     "compute_properties",
     "plot_properties",
     "compute_critical_exponents",
+    "bootstrap_critical_exponents",
     "get_members_of_association",
     "iterations_to_threshold",
+    "Instrumentation",
+    "Checkpoint",
+    "hysteresis",
+    "hysteresis_loop",
+    "influencer_candidates",
+    "screen_influencers",
+    "single_histogram",
+    "multi_histogram",
+    "free_energies",
+    "binder_crossing",
+    "peak_scaling",
+    "scaling_collapse",
     "CacheFile",
     "GifCache"
-]
\ No newline at end of file
+]
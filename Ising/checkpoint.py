@@ -0,0 +1,99 @@
+"""
+checkpoint.py
+Periodic checkpoint of long runs to a compact binary (pickle) file.
+
+compute_properties and iterations_to_threshold accept checkpoint=Checkpoint(path).
+They save their position in the sweep grid, accumulators, model state
+(model._get_state()) and NumPy RNG state at most every `every` seconds and after
+each completed point. Calling them again with the same arguments and checkpoint
+resumes from the file and continues bit-identically to an uninterrupted run;
+completed points are not recomputed.
+
+The arguments of the run are stored as a fingerprint (see fingerprint): graphs
+and StudentGraph objects are compared by content, not by identity, so a run
+on the same graph resumes after the graph has been rebuilt or unpickled.
+"""
+
+import hashlib
+import marshal
+import os
+import pickle
+import time
+from pathlib import Path
+
+
+def fingerprint(obj):
+    """
+    Comparable, picklable summary of the arguments of a run.
+
+    Graphs become a digest of their nodes and edges (with their attributes), a
+    StudentGraph its CSV file, kept associations and graph; containers are
+    converted recursively, classes by qualified name, functions by name and code
+    and any other object by a digest of its pickle.
+    fingerprint(fingerprint(x)) == fingerprint(x).
+    """
+    if isinstance(obj, (str, bytes, int, float, bool, type(None))):
+        return obj
+    if isinstance(obj, dict):
+        return tuple(sorted((repr(k), fingerprint(v)) for k, v in obj.items()))
+    if isinstance(obj, (list, tuple)):
+        return tuple(fingerprint(x) for x in obj)
+    if isinstance(obj, (set, frozenset)):
+        return ("set",) + tuple(sorted(repr(fingerprint(x)) for x in obj))
+    if hasattr(obj, "__code__"):  # function or lambda: its name alone does not identify it
+        return (f"{obj.__module__}.{obj.__qualname__}", _digest(marshal.dumps(obj.__code__)))
+    if isinstance(obj, type) or callable(obj) and hasattr(obj, "__qualname__"):
+        return f"{getattr(obj, '__module__', '')}.{obj.__qualname__}"
+    if hasattr(obj, "is_directed") and hasattr(obj, "edges"):  # networkx graph
+        directed = obj.is_directed()
+        nodes = sorted(repr((n, sorted(d.items()))) for n, d in obj.nodes(data=True))
+        edges = sorted(repr((tuple(e if directed else sorted(e, key=repr)), sorted(d.items())))
+                       for *e, d in obj.edges(data=True))
+        return ("graph", directed, _digest(repr((nodes, edges)).encode()))
+    if hasattr(obj, "df") and hasattr(obj, "G"):  # StudentGraph
+        return ("studentgraph", str(obj.fichier), fingerprint(list(obj.associations_a_garder)),
+                fingerprint(obj.G))
+    return (type(obj).__qualname__, _digest(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)))
+
+
+def _digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class Checkpoint:
+    """Binary checkpoint file written atomically at most every `every` seconds."""
+
+    def __init__(self, path, every=300.0):
+        self.path = Path(path)
+        self.every = every
+        self._last = time.monotonic()
+
+    def due(self):
+        """True once `every` seconds have passed since the last save."""
+        return time.monotonic() - self._last >= self.every
+
+    def load(self):
+        """Return the saved state, or None if there is no checkpoint yet."""
+        if not self.path.exists():
+            return None
+        with open(self.path, "rb") as f:
+            return pickle.load(f)
+
+    def save(self, state):
+        if "run" in state:
+            state = dict(state, run=fingerprint(state["run"]))
+        # Write to a temporary file first so that a crash never leaves a truncated checkpoint
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self.path)
+        self._last = time.monotonic()
+
+    def check(self, state, run):
+        """Raise ValueError if a loaded state belongs to a run with other arguments."""
+        if fingerprint(state["run"]) != fingerprint(run):
+            raise ValueError(
+                f"Checkpoint: {self.path} was written by a different run "
+                f"({state['run']} instead of {fingerprint(run)})"
+            )
@@ -0,0 +1,30 @@
+"""
+coloring.py
+Greedy graph coloring used by the synchronous (sweep) dynamics of the graph models.
+
+Nodes sharing a color are never neighbours, so their spins can be updated all at
+once: this is the graph analogue of the checkerboard decomposition of a lattice.
+The models color their graph once, when they are built, and keep the classes
+together with the adjacency matrix taken at the same time.
+"""
+
+import numpy as np
+
+
+def greedy_coloring(G):
+    """Return {node: color}, neighbours never sharing a color."""
+    import networkx as nx
+    # Direction does not matter for independence: color the underlying graph
+    U = G.to_undirected(as_view=True) if G.is_directed() else G
+    return nx.greedy_color(U, strategy="largest_first")
+
+
+def color_classes(G, nodes, exclude=()):
+    """Index arrays (positions in `nodes`) of each color class, skipping `exclude`."""
+    coloring = greedy_coloring(G)
+    n_colors = max(coloring.values(), default=-1) + 1
+    classes = [[] for _ in range(n_colors)]
+    for i, node in enumerate(nodes):
+        if node not in exclude:
+            classes[coloring[node]].append(i)
+    return [np.array(c, dtype=int) for c in classes if c]
@@ -1,12 +1,11 @@
 import numpy as np
-import networkx as nx
-import matplotlib.pyplot as plt
-import matplotlib.animation as animation
+from .observables import adjacency_matrix, spin_vector, local_fields, graph_energy
+from .coloring import color_classes
 
 class DirectedGraphIsing:
     """Ising model on a directed graph with Metropolis dynamics and animation."""
 
-    def __init__(self, G, T=2.0, J=1.0):
+    def __init__(self, G, T=2.0, J=1.0, local_fields=False, sweep=False):
         if not G.is_directed():
             raise ValueError("G must be a directed graph")
         self.G = G
@@ -15,8 +14,24 @@ class DirectedGraphIsing:
         self.beta = 1.0 / T
         self.dim = 1  # Not used but kept for consistency
         self.length_cycle = self.size  # Not used but kept for consistency
+        self._nodes = list(G.nodes)
+        self._predecessors = {node: list(G.predecessors(node)) for node in self._nodes}
+        self._successors = {node: list(G.successors(node)) for node in self._nodes}
+        self.A = adjacency_matrix(G, self._nodes)  # A[i, j] = 1 for an edge i -> j
+        # local_fields=True keeps the sum of incoming neighbour spins of every node up to date
+        self.local_fields = local_fields
         # Initialize spins randomly
         self._reset_spin()
+        if sweep:
+            # one move = one synchronous update of every color class
+            self._colors = color_classes(G, self._nodes)
+            A_in = self.A.T.tocsr()  # rows give the predecessors of each node
+            self._color_rows = [A_in[c] for c in self._colors]
+            self._color_rows_out = [self.A[c] for c in self._colors]
+            self._loops = self.A.diagonal()
+            self.move = self.sweep_move
+            self.length_cycle = 1
+            self.attempts_per_move = sum(len(c) for c in self._colors)
 
     def _reset_spin(self, to_value=None):
         """Reset spins randomly."""
@@ -24,33 +39,118 @@ class DirectedGraphIsing:
             self.spins = {node: to_value for node in self.G.nodes}
         else:
             self.spins = {node: np.random.choice([-1, 1]) for node in self.G.nodes}
+        self._reset_fields()
         self.energy = self._get_energy()
         self.magnetization = self._get_magnetization()
-    
+
+    def _reset_fields(self):
+        """Recompute the local field (sum of incoming neighbour spins) of every node."""
+        if self.local_fields:
+            fields = local_fields(self.A, self._spin_vector(), incoming=True)
+            self.fields = dict(zip(self._nodes, fields.astype(int).tolist()))
+        else:
+            self.fields = None
+
+    def _spin_vector(self):
+        return spin_vector(self.spins, self._nodes)
+
+    def _get_local_fields(self):
+        """Sum of incoming neighbour spins of every node, in node order."""
+        return local_fields(self.A, self._spin_vector(), incoming=True)
+
     def _get_energy(self):
         """Compute energy for a directed graph: sum over all directed edges."""
-        E = 0.0
-        for i, j in self.G.edges:  # edge from i -> j
-            E += -self.J * self.spins[i] * self.spins[j]
-        return E
+        return graph_energy(self.A, self._spin_vector(), self.J, directed=True)
 
     def _get_magnetization(self):
         return sum(self.spins.values())
 
+    def _get_observables(self):
+        """Extensive observables tracked during the simulation, read by compute_properties."""
+        return {'M': self.magnetization, 'E': self.energy}
+
+    def _get_state(self):
+        """Full dynamical state, used by checkpoint.py."""
+        return {'spins': np.array([self.spins[node] for node in self._nodes], dtype=np.int8),
+                'energy': self.energy, 'magnetization': self.magnetization, 'beta': self.beta}
+
+    def _set_state(self, state):
+        self.spins = dict(zip(self._nodes, state['spins'].tolist()))
+        self.energy = state['energy']
+        self.magnetization = state['magnetization']
+        self.beta = state['beta']
+        self._reset_fields()
+
     def move(self):
         """Perform a single Metropolis update considering incoming neighbors."""
-        node = np.random.choice(list(self.G.nodes))
+        node = self._nodes[np.random.randint(self.size)]
         s = self.spins[node]
         # Only consider incoming neighbors affecting this node
-        neighbor_sum = sum(self.spins[nei] for nei in self.G.predecessors(node))
+        if self.local_fields:
+            neighbor_sum = self.fields[node]
+        else:
+            neighbor_sum = sum(self.spins[nei] for nei in self._predecessors[node])
         delta_E = 2 * self.J * s * neighbor_sum
         if delta_E <= 0 or np.random.rand() < np.exp(-self.beta * delta_E):
-            self.spins[node] *= -1
-            self.energy += delta_E
-            self.magnetization += 2 * self.spins[node]
+            self._flip_site(node, delta_E)
+            return 1
+        return 0
+
+    def sweep_move(self):
+        """Update every node once, all nodes of a color class at the same time."""
+        s = self._spin_vector()
+        flipped = 0
+        for c, A_c, A_out in zip(self._colors, self._color_rows, self._color_rows_out):
+            incoming = A_c @ s
+            delta_E = 2 * self.J * s[c] * incoming
+            accept = np.random.random(len(c)) < np.exp(-self.beta * np.maximum(delta_E, 0))
+            # The energy also contains the edges towards the successors (self-loops never change)
+            true_delta_E = 2 * self.J * s[c] * (incoming + A_out @ s - 2 * self._loops[c] * s[c])
+            s[c[accept]] *= -1
+            self.energy += true_delta_E[accept].sum()
+            flipped += int(np.count_nonzero(accept))
+        self.spins = dict(zip(self._nodes, s.astype(int).tolist()))
+        self.magnetization = int(s.sum())
+        self._reset_fields()
+        return flipped
+
+    def _flip_rate(self, spin, neighbor_sum):
+        """Metropolis flip probability and energy change of a spin given its incoming field."""
+        delta_E = 2 * self.J * spin * neighbor_sum
+        return (1.0 if delta_E <= 0 else np.exp(-self.beta * delta_E)), delta_E
+
+    def _flip_site(self, node, delta_E):
+        """
+        Flip one spin and update energy, magnetization and local fields.
+        delta_E only drives the acceptance (incoming field); the energy sums every
+        directed edge, so it changes through the successors as well.
+        """
+        s = self.spins[node]
+        self.energy += 2 * self.J * s * (sum(self.spins[nei] for nei in self._predecessors[node] if nei != node)
+                                         + sum(self.spins[nei] for nei in self._successors[node] if nei != node))
+        self.spins[node] *= -1
+        self.magnetization += 2 * self.spins[node]
+        if self.local_fields:
+            # The flipped node only enters the field of its successors
+            step = 2 * self.spins[node]
+            for nei in self._successors[node]:
+                self.fields[nei] += step
+
+    # --- Site interface used by the kinetic engine (see nfoldway.py) ---
+    def _sites(self):
+        return self._nodes
+
+    def _dependents(self, node):
+        return self._successors[node]
+
+    def _local_field(self, node):
+        return sum(self.spins[nei] for nei in self._predecessors[node])
 
     def run_animation(self, nt=200, interval=50, save_path="directed_graph_animation.gif"):
         """Animate the Ising model on the directed graph with magnetization plot."""
+        import networkx as nx
+        import matplotlib.pyplot as plt
+        import matplotlib.animation as animation
         steps, magnet = [], []
         pos = nx.spring_layout(self.G, seed=42)
 
@@ -75,7 +175,7 @@ class DirectedGraphIsing:
         ax2.set_title("Magnetization vs MC cycles")
 
         def do_mc_cycle(n):
-            for _ in range(self.size):
+            for _ in range(self.length_cycle):
                 self.move()
             # Update node colors
             new_colors = ['red' if self.spins[n]==1 else 'black' for n in self.G.nodes]
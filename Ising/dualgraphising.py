@@ -1,14 +1,13 @@
 import numpy as np
-import networkx as nx
-import matplotlib.pyplot as plt
-import matplotlib.animation as animation
+from .observables import adjacency_matrix, spin_vector, graph_energy
+from .coloring import color_classes
 
 class DualGraphIsing:
     """
     Two-layer Ising model (A and B) on the same graph,
     with interlayer coupling C.
     """
-    def __init__(self, G, T=2.0, J_A=1.0, J_B=1.0, C=0.2):
+    def __init__(self, G, T=2.0, J_A=1.0, J_B=1.0, C=0.2, sweep=False):
         self.G = G
         self.size = G.number_of_nodes()
         self.beta = 1.0 / T
@@ -17,7 +16,20 @@ class DualGraphIsing:
         self.C = C
         self.dim = 1  # Not used but kept for consistency
         self.length_cycle = self.size  # Not used but kept for consistency
+        self.attempts_per_move = 2  # one attempt per layer
+        self._nodes = list(G.nodes)
+        # A self-loop only adds a constant to the energy: it is left out of the dynamics
+        self._neighbors = {node: [nei for nei in G.neighbors(node) if nei != node] for node in self._nodes}
+        self.A = adjacency_matrix(G, self._nodes, self_loops=False)
+        self._self_loops = sum(1 for i, j in G.edges if i == j)
         self._reset_spin()
+        if sweep:
+            # one move = one synchronous update of every (layer, color) class
+            self._colors = color_classes(G, self._nodes)
+            self._color_rows = [self.A[c] for c in self._colors]
+            self.move = self.sweep_move
+            self.length_cycle = 1
+            self.attempts_per_move = 2 * self.size
 
     def _reset_spin(self, to_value=None):
         """Réinitialise les spins des deux couches."""
@@ -26,37 +38,97 @@ class DualGraphIsing:
             self.spins_B = {node: to_value for node in self.G.nodes}
         else:
             self.spins_A = {node: np.random.choice([-1, 1]) for node in self.G.nodes}
-            self.spins_B = {node: np.random.choice([-1, 1]) for node in self.G.nodes}   
+            self.spins_B = {node: np.random.choice([-1, 1]) for node in self.G.nodes}
+        self.magnetization_A = self._get_magnetization(self.spins_A)
+        self.magnetization_B = self._get_magnetization(self.spins_B)
+        self.magnetization = self._get_magnetization()
+        self.overlap = self._get_overlap()
+        self.energy = self._get_energy()
 
     def _get_energy(self):
         """Total energy of the two layers with interlayer coupling."""
-        E_A, E_B, E_C = 0.0, 0.0, 0.0
-        for i, j in self.G.edges:
-            E_A += -self.J_A * self.spins_A[i] * self.spins_A[j]
-            E_B += -self.J_B * self.spins_B[i] * self.spins_B[j]
-        for node in self.G.nodes:
-            E_C += -self.C * self.spins_A[node] * self.spins_B[node]
-        return E_A + E_B + E_C
+        s_A = spin_vector(self.spins_A, self._nodes)
+        s_B = spin_vector(self.spins_B, self._nodes)
+        E_A = graph_energy(self.A, s_A, self.J_A)
+        E_B = graph_energy(self.A, s_B, self.J_B)
+        E_C = -self.C * (s_A @ s_B)
+        return E_A + E_B + E_C - (self.J_A + self.J_B) * self._self_loops
 
     def _get_magnetization(self, spins=None):
-        """Normalized magnetization of a layer."""
+        """Total magnetization of a layer, or mean of the two layers if spins is None."""
         if spins is None:
-            spins = self.spins_A
-        return sum(spins.values()) / self.size
+            return (sum(self.spins_A.values()) + sum(self.spins_B.values())) / 2
+        return sum(spins.values())
+
+    def _get_overlap(self):
+        """Interlayer overlap sum_i s_A(i) s_B(i)."""
+        return sum(self.spins_A[node] * self.spins_B[node] for node in self._nodes)
+
+    def _get_observables(self):
+        """Tracked observables, with layer-resolved magnetizations and overlap."""
+        return {'M': self.magnetization, 'E': self.energy,
+                'M_A': self.magnetization_A, 'M_B': self.magnetization_B, 'Q': self.overlap}
+
+    def _get_state(self):
+        """Full dynamical state, used by checkpoint.py."""
+        return {'spins_A': np.array([self.spins_A[node] for node in self._nodes], dtype=np.int8),
+                'spins_B': np.array([self.spins_B[node] for node in self._nodes], dtype=np.int8),
+                'energy': self.energy, 'magnetization': self.magnetization,
+                'magnetization_A': self.magnetization_A, 'magnetization_B': self.magnetization_B,
+                'overlap': self.overlap, 'beta': self.beta}
+
+    def _set_state(self, state):
+        self.spins_A = dict(zip(self._nodes, state['spins_A'].tolist()))
+        self.spins_B = dict(zip(self._nodes, state['spins_B'].tolist()))
+        for name in ('energy', 'magnetization', 'magnetization_A', 'magnetization_B', 'overlap', 'beta'):
+            setattr(self, name, state[name])
 
     def move(self):
         """Simple metropolis on both layers with inter-layer coupling."""
+        flipped = 0
         for layer in ['A', 'B']:
             spins = self.spins_A if layer == 'A' else self.spins_B
             other = self.spins_B if layer == 'A' else self.spins_A
             J = self.J_A if layer == 'A' else self.J_B
 
-            node = np.random.choice(list(self.G.nodes))
+            node = self._nodes[np.random.randint(self.size)]
             s = spins[node]
-            neighbor_sum = sum(spins[nei] for nei in self.G.neighbors(node))
+            neighbor_sum = sum(spins[nei] for nei in self._neighbors[node])
             delta_E = 2 * s * (J * neighbor_sum + self.C * other[node])
             if delta_E <= 0 or np.random.rand() < np.exp(-self.beta * delta_E):
                 spins[node] *= -1
+                self.energy += delta_E
+                if layer == 'A':
+                    self.magnetization_A -= 2 * s
+                else:
+                    self.magnetization_B -= 2 * s
+                self.magnetization -= s
+                self.overlap -= 2 * s * other[node]
+                flipped += 1
+        return flipped
+
+    def sweep_move(self):
+        """
+        Update every node of both layers once: the color classes of layer A and
+        layer B are updated alternately, all nodes of a class at the same time.
+        """
+        s_A = spin_vector(self.spins_A, self._nodes)
+        s_B = spin_vector(self.spins_B, self._nodes)
+        flipped = 0
+        for c, A_c in zip(self._colors, self._color_rows):
+            for s, other, J in ((s_A, s_B, self.J_A), (s_B, s_A, self.J_B)):
+                delta_E = 2 * s[c] * (J * (A_c @ s) + self.C * other[c])
+                accept = np.random.random(len(c)) < np.exp(-self.beta * np.maximum(delta_E, 0))
+                s[c[accept]] *= -1
+                self.energy += delta_E[accept].sum()
+                flipped += int(np.count_nonzero(accept))
+        self.spins_A = dict(zip(self._nodes, s_A.astype(int).tolist()))
+        self.spins_B = dict(zip(self._nodes, s_B.astype(int).tolist()))
+        self.magnetization_A = int(s_A.sum())
+        self.magnetization_B = int(s_B.sum())
+        self.magnetization = (self.magnetization_A + self.magnetization_B) / 2
+        self.overlap = int(s_A @ s_B)
+        return flipped
 
     def make_animation(self, nt=200, frames_per_cycle=1, save_path="dual_ising.gif", interval=100):
         """
@@ -65,6 +137,10 @@ class DualGraphIsing:
         - frames_per_cycle: how many Monte Carlo steps per frame
         - gif_path: name of the GIF file to save
         """
+        import networkx as nx
+        import matplotlib.pyplot as plt
+        import matplotlib.animation as animation
+
         pos = nx.spring_layout(self.G, seed=42)
         fig, axes = plt.subplots(1, 3, figsize=(12, 4))
         axA, axB, axM = axes
@@ -79,7 +155,7 @@ class DualGraphIsing:
         steps, magsA, magsB = [], [], []
 
         def update(frame):
-            for _ in range(frames_per_cycle * self.size):
+            for _ in range(frames_per_cycle * self.length_cycle):
                 self.move()
 
             axA.clear(); axB.clear(); axM.clear()
@@ -104,8 +180,8 @@ class DualGraphIsing:
             axB.set_title("Decision B")
 
             # Magnetisations
-            mA = self._get_magnetization(self.spins_A)
-            mB = self._get_magnetization(self.spins_B)
+            mA = self.magnetization_A / self.size
+            mB = self.magnetization_B / self.size
             magsA.append(mA); magsB.append(mB); steps.append(frame)
             axM.plot(steps, magsA, 'r-')
             axM.plot(steps, magsB, 'b-')
@@ -0,0 +1,209 @@
+"""
+fitting.py
+Power-law fits of the critical exponents from compute_properties results.
+
+bootstrap_critical_exponents repeats the fits of compute_critical_exponents on
+resampled data and over several fit windows, in a process pool, and returns each
+exponent with a confidence interval and its sensitivity to the window. With the
+time series of compute_properties(..., record_series=True), the measurements of
+every temperature are resampled by blocks (to respect autocorrelations); from
+plain averages, the temperature points themselves are resampled.
+"""
+
+import itertools
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.optimize import OptimizeWarning, curve_fit
+from scipy.stats import norm
+
+def _M_law(T, Tc, beta, A):
+    return A * np.abs(Tc - T)**beta
+
+
+def _chi_law(T, Tc, gamma, A):
+    return A * np.abs(T - Tc)**(-gamma)
+
+
+def _C_law(T, Tc, alpha, A):
+    return A * np.abs(T - Tc)**(-alpha)
+
+
+def _fit_exponents(T, M, chi, C, Tc_guess, window=0.1, window_M=None):
+    """The three power-law fits; chi and C within Tc_guess*(1 ± window), M below Tc_guess."""
+    # --- Fit magnetization for T < Tc ---
+    mask_M = T < Tc_guess
+    if window_M is not None:
+        mask_M &= T > (1 - window_M) * Tc_guess
+    popt_M, _ = curve_fit(_M_law, T[mask_M], M[mask_M],
+                          p0=[Tc_guess, 0.125, 1.0], maxfev=5000)
+    Tc_fit_M, beta_fit, A_M = popt_M
+
+    # --- Fit susceptibility around Tc ---
+    mask_chi = (T > (1 - window)*Tc_guess) & (T < (1 + window)*Tc_guess)
+    popt_chi, _ = curve_fit(_chi_law, T[mask_chi], chi[mask_chi],
+                            p0=[Tc_guess, 1.75, 1.0], maxfev=5000)
+    Tc_fit_chi, gamma_fit, A_chi = popt_chi
+
+    # --- Fit specific heat around Tc ---
+    mask_C = (T > (1 - window)*Tc_guess) & (T < (1 + window)*Tc_guess)
+    popt_C, _ = curve_fit(_C_law, T[mask_C], C[mask_C],
+                           p0=[Tc_guess, 0.0, 1.0], maxfev=5000)
+    Tc_fit_C, alpha_fit, A_C = popt_C
+
+    # --- Combine results into a dictionary ---
+    return {
+        'Tc_M': Tc_fit_M, 'beta': beta_fit, 'A_M': A_M,
+        'Tc_chi': Tc_fit_chi, 'gamma': gamma_fit, 'A_chi': A_chi,
+        'Tc_C': Tc_fit_C, 'alpha': alpha_fit, 'A_C': A_C
+    }
+
+
+def compute_critical_exponents(results, Tc_guess, window=0.1, window_M=None):
+    """
+    Fit critical exponents β, γ, α from Monte Carlo results near a given Tc.
+
+    Parameters
+    ----------
+    results : dict with keys 'T', 'M', 'chi', 'C'
+    Tc_guess : float that estimate of the critical temperature.
+    window : relative half-width of the chi and C fits around Tc_guess.
+    window_M : relative width of the M fit below Tc_guess (None: every T < Tc_guess).
+
+    Returns
+    -------
+    dict
+        Dictionary containing:
+        - Fitted critical temperatures: 'Tc_M', 'Tc_chi', 'Tc_C'
+        - Critical exponents: 'beta', 'gamma', 'alpha'
+        - Amplitudes: 'A_M', 'A_chi', 'A_C'
+    """
+    T = np.array(results['T'])
+    M = np.array(results['M'])
+    chi = np.array(results['chi'])
+    C = np.array(results['C'])
+    return _fit_exponents(T, M, chi, C, Tc_guess, window, window_M)
+
+
+# ------------------------------
+# Resampling
+# ------------------------------
+_KEYS = ('Tc_M', 'beta', 'A_M', 'Tc_chi', 'gamma', 'A_chi', 'Tc_C', 'alpha', 'A_C')
+
+
+def _series_resamples(series, method, n_resamples, n_blocks):
+    """Resampled M, chi, C of every point, arrays of shape (resamples, points)."""
+    M, chi, C = [], [], []
+    for point in series:
+        N, T = point['N'], 1.0 / point['beta']
+        x, E = np.abs(point['data']['M']), point['data']['E']
+        size = len(x) // n_blocks
+        if size == 0:
+            raise ValueError(f"Not enough measurements for {n_blocks} blocks")
+        # Block sums of x, x^2, E, E^2: shape (4, n_blocks)
+        blocks = np.array([x, x**2, E, E**2])[:, :size * n_blocks].reshape(4, n_blocks, size).sum(axis=2)
+        if method == 'bootstrap':
+            picks = np.random.randint(n_blocks, size=(n_resamples, n_blocks))
+            av = blocks[:, picks].sum(axis=2) / (size * n_blocks)
+        else:  # leave one block out
+            av = (blocks.sum(axis=1, keepdims=True) - blocks) / (size * (n_blocks - 1))
+        av_x, av_x2, av_E, av_E2 = av
+        M.append(av_x / N)
+        chi.append((av_x2 - av_x**2) / (N * T))
+        C.append((av_E2 - av_E**2) / (N * T**2))
+    return np.array(M).T, np.array(chi).T, np.array(C).T
+
+
+def _point_resamples(n_points, method, n_resamples):
+    """Indices of the temperature points kept in each resample."""
+    if method == 'bootstrap':
+        # Sorted so that every resample is still a scan in increasing T
+        return np.sort(np.random.randint(n_points, size=(n_resamples, n_points)), axis=1)
+    return np.array([np.delete(np.arange(n_points), k) for k in range(n_points)])
+
+
+def _fit_resamples(args):
+    """Fit every resample for one window choice; failed fits give nan."""
+    T, M, chi, C, Tc_guess, window, window_M = args
+    fits = np.full((len(M), len(_KEYS)), np.nan)
+    for r in range(len(M)):
+        try:
+            with np.errstate(all='ignore'), warnings.catch_warnings():
+                warnings.simplefilter('ignore', OptimizeWarning)
+                fit = _fit_exponents(T[r], M[r], chi[r], C[r], Tc_guess, window, window_M)
+        except (RuntimeError, TypeError, ValueError):
+            continue  # no convergence, or too few points left in the window
+        fits[r] = [fit[key] for key in _KEYS]
+    return fits
+
+
+def bootstrap_critical_exponents(results, Tc_guess, method='bootstrap', n_resamples=200, n_blocks=20,
+                                 windows=(0.1, 0.05, 0.15, 0.2), windows_M=(None,), confidence=0.68,
+                                 n_jobs=1):
+    """
+    Critical exponents with confidence intervals and window sensitivity.
+
+    results is a compute_properties result (var_name='T'); if it holds 'series'
+    (record_series=True) the measurements are resampled in n_blocks blocks per
+    temperature, otherwise the temperature points are resampled. method is
+    'bootstrap' (n_resamples resamples) or 'jackknife' (leave one block/point out).
+    Every resample is fitted for every (window, window_M) pair of windows x windows_M
+    (see compute_critical_exponents), one pair per task of a pool of n_jobs processes.
+
+    Returns {key: {'value', 'error', 'ci', 'windows', 'window_spread'}} for every
+    key of compute_critical_exponents: 'value' is the fit of the full data at the
+    first window pair and 'error', 'ci' its statistical uncertainty from the
+    resamples fitted with the same windows (standard deviation and percentile
+    interval for the bootstrap, jackknife standard error and normal interval for
+    the jackknife). 'windows' maps each window pair to its own {'value', 'error',
+    'ci'}; 'window_spread' (max - min of their values) is the window sensitivity.
+    """
+    if method not in ('bootstrap', 'jackknife'):
+        raise ValueError("method must be 'bootstrap' or 'jackknife'")
+    T = np.array(results['T'], dtype=float)
+    if 'series' in results:
+        M, chi, C = _series_resamples(results['series'], method, n_resamples, n_blocks)
+        T_r = np.broadcast_to(T, M.shape)
+    else:
+        picks = _point_resamples(len(T), method, n_resamples)
+        T_r, M, chi, C = (np.array(results[key], dtype=float)[picks] for key in ('T', 'M', 'chi', 'C'))
+
+    pairs = list(itertools.product(windows, windows_M))
+    jobs = [(T_r, M, chi, C, Tc_guess, window, window_M) for window, window_M in pairs]
+    full = [_fit_resamples((T[None], np.array(results['M'], dtype=float)[None],
+                            np.array(results['chi'], dtype=float)[None],
+                            np.array(results['C'], dtype=float)[None], Tc_guess, window, window_M))[0]
+            for window, window_M in pairs]
+    if n_jobs == 1:
+        fits = [_fit_resamples(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            fits = list(pool.map(_fit_resamples, jobs))
+
+    exponents = {}
+    for k, key in enumerate(_KEYS):
+        # Statistical error of each window pair from its own resamples only: the
+        # spread between windows is reported separately as 'window_spread'
+        by_window = {pair: _interval(full_fit[k], fit[:, k], method, confidence)
+                     for pair, full_fit, fit in zip(pairs, full, fits)}
+        finite = [w['value'] for w in by_window.values() if np.isfinite(w['value'])]
+        exponents[key] = dict(by_window[pairs[0]], windows=by_window,
+                              window_spread=max(finite) - min(finite) if finite else np.nan)
+    return exponents
+
+
+def _interval(value, samples, method, confidence):
+    """{'value', 'error', 'ci'} of a full-data fit from the fits of its resamples."""
+    samples = samples[np.isfinite(samples)]
+    if len(samples) < 2:
+        return {'value': value, 'error': np.nan, 'ci': (np.nan, np.nan)}
+    if method == 'bootstrap':
+        error = np.std(samples, ddof=1)
+        ci = tuple(np.percentile(samples, [50 * (1 - confidence), 50 * (1 + confidence)]))
+    else:
+        n = len(samples)
+        error = np.sqrt((n - 1) / n * np.sum((samples - samples.mean())**2))
+        z = norm.ppf(0.5 + confidence / 2)
+        ci = (value - z * error, value + z * error)
+    return {'value': value, 'error': error, 'ci': ci}
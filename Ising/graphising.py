@@ -1,28 +1,48 @@
 import numpy as np
-import networkx as nx
-import matplotlib.pyplot as plt
-import matplotlib.animation as animation
 from .utils import get_members_of_association
+from .observables import adjacency_matrix, spin_vector, local_fields, graph_energy
+from .coloring import color_classes
 
 class GraphIsing:
     """Ising model on an arbitrary graph with working animation."""
 
-    def __init__(self, G, T=2.0, J=1.0, influent_association=None, student_graph=None):
+    def __init__(self, G, T=2.0, J=1.0, influent_association=None, student_graph=None, local_fields=False,
+                 sweep=False, h=0, influencers=None):
         self.G = G
         self.size = G.number_of_nodes()
         self.dim = 1
         self.length_cycle = self.size # one MC cycle = N updates
         self.J = J
         self.beta = 1.0 / T
+        self.h = h
+        self._nodes = list(G.nodes)
+        # A self-loop only adds the constant -J to the energy: it is left out of the dynamics
+        self._neighbors = {node: [nei for nei in G.neighbors(node) if nei != node] for node in self._nodes}
+        self.A = adjacency_matrix(G, self._nodes, self_loops=False)
+        self._self_loops = sum(1 for i, j in G.edges if i == j)
+        # local_fields=True keeps the sum of neighbour spins of every node up to date,
+        # so that a rejected move costs O(1) instead of O(degree)
+        self.local_fields = local_fields
         self._reset_spin()
-        if influent_association:
-            influencer_nodes = get_members_of_association(student_graph, influent_association) if influent_association else None
+        if influent_association or influencers is not None:
+            if influent_association:
+                influencer_nodes = get_members_of_association(student_graph, influent_association)
+            else:
+                influencer_nodes = list(influencers)
             self.influencer_nodes = set(influencer_nodes) if influencer_nodes else set()  # nœuds bloqués
-            self.spins = {node: (1 if node in influencer_nodes else -1) for node in G.nodes}
+            self.spins = {node: (1 if node in self.influencer_nodes else -1) for node in G.nodes}
+            self._reset_fields()
         else:
             self.influencer_nodes = set()
         self.energy = self._get_energy()
         self.magnetization = self._get_magnetization()
+        if sweep:
+            # one move = one synchronous update of every color class
+            self._colors = color_classes(G, self._nodes, exclude=self.influencer_nodes)
+            self._color_rows = [self.A[c] for c in self._colors]
+            self.move = self.sweep_move
+            self.length_cycle = 1
+            self.attempts_per_move = sum(len(c) for c in self._colors)
 
 
     def _reset_spin(self, to_value=None):
@@ -31,32 +51,113 @@ class GraphIsing:
             self.spins = {node: to_value for node in self.G.nodes}
         else:
             self.spins = {node: np.random.choice([-1, 1]) for node in self.G.nodes}
+        for node in getattr(self, 'influencer_nodes', ()):
+            if node in self.spins:
+                self.spins[node] = 1  # influencers stay pinned to +1
+        self._reset_fields()
         self.energy = self._get_energy()
         self.magnetization = self._get_magnetization()
 
+    def _reset_fields(self):
+        """Recompute the local field (sum of neighbour spins) of every node."""
+        if self.local_fields:
+            fields = local_fields(self.A, self._spin_vector())
+            self.fields = dict(zip(self._nodes, fields.astype(int).tolist()))
+        else:
+            self.fields = None
+
+    def _spin_vector(self):
+        return spin_vector(self.spins, self._nodes)
+
+    def _get_local_fields(self):
+        """Sum of neighbour spins of every node, in node order."""
+        return local_fields(self.A, self._spin_vector())
+
     def _get_energy(self):
-        E = 0.0
-        for i, j in self.G.edges:
-            E += -self.J * self.spins[i] * self.spins[j]
-        return E
+        s = self._spin_vector()
+        return graph_energy(self.A, s, self.J) - self.J * self._self_loops - self.h * s.sum()
 
     def _get_magnetization(self):
         return sum(self.spins.values())
 
+    def _get_observables(self):
+        """Extensive observables tracked during the simulation, read by compute_properties."""
+        return {'M': self.magnetization, 'E': self.energy}
+
+    def _get_state(self):
+        """Full dynamical state, used by checkpoint.py."""
+        return {'spins': np.array([self.spins[node] for node in self._nodes], dtype=np.int8),
+                'energy': self.energy, 'magnetization': self.magnetization, 'beta': self.beta, 'h': self.h}
+
+    def _set_state(self, state):
+        self.spins = dict(zip(self._nodes, state['spins'].tolist()))
+        self.energy = state['energy']
+        self.magnetization = state['magnetization']
+        self.beta = state['beta']
+        self.h = state['h']
+        self._reset_fields()
+
     def move(self):
-        node = np.random.choice(list(self.G.nodes))
+        node = self._nodes[np.random.randint(self.size)]
         if node in self.influencer_nodes:
-            return
+            return 0
         s = self.spins[node]
-        neighbor_sum = sum(self.spins[nei] for nei in self.G.neighbors(node))
-        delta_E = 2 * self.J * s * neighbor_sum
+        if self.local_fields:
+            neighbor_sum = self.fields[node]
+        else:
+            neighbor_sum = sum(self.spins[nei] for nei in self._neighbors[node])
+        delta_E = 2 * s * (self.J * neighbor_sum + self.h)
         if delta_E <= 0 or np.random.rand() < np.exp(-self.beta * delta_E):
-            self.spins[node] *= -1
-            self.energy += delta_E
-            self.magnetization += 2 * self.spins[node]
+            self._flip_site(node, delta_E)
+            return 1
+        return 0
+
+    def sweep_move(self):
+        """Update every free node once, all nodes of a color class at the same time."""
+        s = self._spin_vector()
+        flipped = 0
+        for c, A_c in zip(self._colors, self._color_rows):
+            delta_E = 2 * s[c] * (self.J * (A_c @ s) + self.h)
+            accept = np.random.random(len(c)) < np.exp(-self.beta * np.maximum(delta_E, 0))
+            s[c[accept]] *= -1
+            self.energy += delta_E[accept].sum()
+            flipped += int(np.count_nonzero(accept))
+        self.spins = dict(zip(self._nodes, s.astype(int).tolist()))
+        self.magnetization = int(s.sum())
+        self._reset_fields()
+        return flipped
+
+    def _flip_rate(self, spin, neighbor_sum):
+        """Metropolis flip probability and energy change of a spin given its local field."""
+        delta_E = 2 * spin * (self.J * neighbor_sum + self.h)
+        return (1.0 if delta_E <= 0 else np.exp(-self.beta * delta_E)), delta_E
+
+    def _flip_site(self, node, delta_E):
+        """Flip one spin and update energy, magnetization and local fields."""
+        self.spins[node] *= -1
+        self.energy += delta_E
+        self.magnetization += 2 * self.spins[node]
+        if self.local_fields:
+            # Only the neighbours of the flipped node see their field change
+            step = 2 * self.spins[node]
+            for nei in self._neighbors[node]:
+                self.fields[nei] += step
+
+    # --- Site interface used by the kinetic engine (see nfoldway.py) ---
+    def _sites(self):
+        return self._nodes
+
+    def _dependents(self, node):
+        return self._neighbors[node]
+
+    def _local_field(self, node):
+        return sum(self.spins[nei] for nei in self._neighbors[node])
 
     def run_animation(self, nt=200, interval=50, save_path="graph_animation.gif"):
         """Animate the Ising model with magnetization plot like in 2D case."""
+        import networkx as nx
+        import matplotlib.pyplot as plt
+        import matplotlib.animation as animation
         steps, magnet = [], []
         pos = nx.spring_layout(self.G, seed=42)
 
@@ -81,8 +182,8 @@ class GraphIsing:
         ax2.set_title("Magnetization vs MC cycles")
 
         def do_mc_cycle(n):
-            # Perform N Metropolis steps per cycle
-            for _ in range(self.size):
+            # Perform one MC cycle (N Metropolis steps or one sweep)
+            for _ in range(self.length_cycle):
                 self.move()
 
             # Update node colors
@@ -0,0 +1,143 @@
+"""
+hysteresis.py
+Field-ramp hysteresis loops with the configuration carried over from one field to the next.
+
+hysteresis_loop ramps the field h of a model (NormalIsing, GraphIsing, or an
+NFoldWay engine around them) from +h_max down to -h_max and back up, changing it
+by `rate` after every sweep (model.length_cycle moves). Nothing is reset or
+re-thermalised along the way, so the sweep rate sets how far the system lags
+behind the field. Along each branch it records M(h) per spin and two events:
+- nucleation: the first field where |m| falls below `nucleation` (the reversal starts)
+- coercive: the field where m changes sign (linear interpolation)
+
+hysteresis runs independent replicas in a process pool (n_jobs) and averages
+their loop shapes and coercive fields. With out_dir, every replica streams its
+loops to out_dir/replica_<r>.jsonl as it goes: one JSON record per sweep
+({"loop", "branch", "h", "M"}) and one per event ({"loop", "branch", "event", "h"}).
+"""
+
+import json
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+
+def field_grid(h_max, rate):
+    """Fields of the descending branch, from h_max to -h_max in steps of about `rate`."""
+    if h_max <= 0 or rate <= 0:
+        raise ValueError("h_max and rate must be positive")
+    return np.linspace(h_max, -h_max, int(round(2 * h_max / rate)) + 1)
+
+
+def _set_field(model, h):
+    # The energy contains -h M: keep the running energy consistent with the new field
+    model.energy -= (h - model.h) * model.magnetization
+    model.h = h
+
+
+def _crossing(grid, m, level):
+    """First field where m - level changes sign, linearly interpolated (nan if never)."""
+    d = np.asarray(m) - level
+    change = np.nonzero(np.sign(d[:-1]) * np.sign(d[1:]) <= 0)[0]
+    change = change[d[change] != d[change + 1]]
+    if len(change) == 0:
+        return np.nan
+    k = change[0]
+    return grid[k] - d[k] * (grid[k + 1] - grid[k]) / (d[k + 1] - d[k])
+
+
+def hysteresis_loop(model, h_max, rate, n_loops=1, n_warmup=0, nucleation=0.9, stream=None):
+    """
+    Run n_loops consecutive loops on `model`, starting from all spins up at h = h_max.
+
+    Returns {'h_down', 'h_up': fields of the two branches, 'M_down', 'M_up': one array
+    of m per loop, 'nucleation_down'/'nucleation_up', 'coercive_down'/'coercive_up':
+    one field per loop}. If `stream` is an open text file, the records are written to it.
+    """
+    N = model.size ** model.dim
+    down = field_grid(h_max, rate)
+    branches = (('down', down), ('up', down[::-1]))
+    results = {'h_down': down, 'h_up': down[::-1]}
+    for name, _ in branches:
+        for key in ('M_', 'nucleation_', 'coercive_'):
+            results[key + name] = []
+
+    if not hasattr(model, 'h'):
+        raise ValueError(f"{type(model).__name__} has no field h")
+    if getattr(model, 'wolff_move', None) is not None and model.move == model.wolff_move:
+        raise ValueError("Wolff cluster moves ignore the field h: use Metropolis dynamics")
+    model._reset_spin(1)
+    _set_field(model, h_max)
+    for _ in range(n_warmup):
+        for _ in range(model.length_cycle):
+            model.move()
+
+    for loop in range(n_loops):
+        for name, grid in branches:
+            sign = 1 if name == 'down' else -1  # magnetization at the start of the branch
+            m = np.empty(len(grid))
+            for k, h in enumerate(grid):
+                _set_field(model, h)
+                for _ in range(model.length_cycle):
+                    model.move()
+                m[k] = model.magnetization / N
+                if stream:
+                    stream.write(json.dumps({'loop': loop, 'branch': name, 'h': float(h), 'M': float(m[k])}) + '\n')
+            events = {'nucleation': _crossing(grid, sign * m, nucleation), 'coercive': _crossing(grid, m, 0.0)}
+            for event, h in events.items():
+                results[event + '_' + name].append(h)
+                if stream and not np.isnan(h):
+                    stream.write(json.dumps({'loop': loop, 'branch': name, 'event': event, 'h': float(h)}) + '\n')
+            results['M_' + name].append(m)
+            if stream:
+                stream.flush()
+    return results
+
+
+def _run_replica(args):
+    class_model, kargs, h_max, rate, n_loops, n_warmup, nucleation, seed, path = args
+    np.random.seed(seed)
+    model = class_model(**kargs)
+    if path is None:
+        return hysteresis_loop(model, h_max, rate, n_loops, n_warmup, nucleation)
+    with open(path, 'w') as stream:
+        return hysteresis_loop(model, h_max, rate, n_loops, n_warmup, nucleation, stream)
+
+
+def hysteresis(class_model, kargs, h_max, rate, n_replicas=1, n_loops=1, n_warmup=0, nucleation=0.9,
+               out_dir=None, n_jobs=1, seed=None):
+    """
+    Hysteresis loops of n_replicas independent models class_model(**kargs), each
+    running n_loops consecutive loops (see hysteresis_loop), n_jobs at a time.
+
+    Returns a results dict with the fields 'h_down', 'h_up', the loop shapes 'M_down',
+    'M_up' averaged over every loop (with their standard deviation 'M_down_std',
+    'M_up_std'), the events of every loop ('coercive_down', ..., replica by replica
+    in 'replicas') and the mean coercive field 'h_c' = (coercive_up - coercive_down) / 2.
+    Replica r is seeded with seed + r (seeds drawn from np.random if seed is None).
+    """
+    seeds = (np.random.randint(2**31, size=n_replicas) if seed is None
+             else seed + np.arange(n_replicas))
+    if out_dir is not None:
+        Path(out_dir).mkdir(parents=True, exist_ok=True)
+    jobs = [(class_model, kargs, h_max, rate, n_loops, n_warmup, nucleation, int(seeds[r]),
+             None if out_dir is None else Path(out_dir) / f"replica_{r}.jsonl")
+            for r in range(n_replicas)]
+    if n_jobs == 1:
+        replicas = [_run_replica(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            replicas = list(pool.map(_run_replica, jobs))
+
+    results = {'h_down': replicas[0]['h_down'], 'h_up': replicas[0]['h_up'], 'replicas': replicas}
+    for name in ('down', 'up'):
+        loops = np.array([m for replica in replicas for m in replica['M_' + name]])
+        results['M_' + name] = loops.mean(axis=0)
+        results['M_' + name + '_std'] = loops.std(axis=0)
+        for event in ('nucleation', 'coercive'):
+            results[event + '_' + name] = np.array([h for replica in replicas for h in replica[event + '_' + name]])
+    h_c = (results['coercive_up'] - results['coercive_down']) / 2
+    results['h_c'] = np.nanmean(h_c) if not np.all(np.isnan(h_c)) else np.nan
+    results['h_c_std'] = np.nanstd(h_c) if not np.all(np.isnan(h_c)) else np.nan
+    return results
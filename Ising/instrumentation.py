@@ -0,0 +1,104 @@
+"""
+instrumentation.py
+Opt-in performance instrumentation: per-phase wall-clock timers and move statistics.
+
+Every move of the models returns the number of spins it flipped (0 or 1 for a
+single-spin Metropolis move, the cluster size for a Wolff move, the number of
+flips of a whole sweep...) and `attempts_per_move` (default 1) gives the number of
+spin-flip attempts one move stands for (None for Wolff cluster moves, which are
+always accepted: their histogram is the cluster-size histogram). Attaching an Instrumentation to a model
+wraps its move() to count calls, attempts and flips; nothing is added to the
+models themselves when instrumentation is off.
+"""
+
+import time
+from contextlib import contextmanager
+
+
+class Instrumentation:
+    """Per-phase timers, flip counters and flips-per-move histogram."""
+
+    def __init__(self):
+        self.timers = {}
+        self.moves = 0
+        self.attempted = 0
+        self.accepted = 0
+        self.histogram = {}  # flips per move -> count (cluster sizes for Wolff)
+        self._attached = []
+
+    @contextmanager
+    def phase(self, name):
+        """Accumulate the wall-clock time spent in the block under `name`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timers[name] = self.timers.get(name, 0.0) + time.perf_counter() - start
+
+    def attach(self, model, max_time=None):
+        """
+        Wrap model.move (and model.flip for the n-fold way engine) to count flips.
+        With max_time, flips past that clock value (the one overshooting a run
+        limit) are not counted and attempts are counted up to max_time only.
+        """
+        move = model.move
+        attempts = getattr(model, "attempts_per_move", 1)
+
+        def counted_move():
+            flipped = move()
+            self.moves += 1
+            if attempts:
+                self.attempted += attempts
+            self.accepted += flipped
+            self.histogram[flipped] = self.histogram.get(flipped, 0) + 1
+            return flipped
+
+        self._attached.append((model, "move", "move" in vars(model) and move))
+        model.move = counted_move
+
+        if hasattr(model, "flip"):
+            flip = model.flip
+
+            def counted_flip():
+                before = model.time
+                t = flip()
+                end = t if max_time is None else min(t, max_time)
+                if end != float("inf"):
+                    self.attempted += end - before
+                if t == end and t != float("inf"):
+                    self.moves += 1
+                    self.accepted += 1
+                    self.histogram[1] = self.histogram.get(1, 0) + 1
+                return t
+
+            self._attached.append((model, "flip", "flip" in vars(model) and flip))
+            model.flip = counted_flip
+        return model
+
+    def detach(self):
+        """Restore the original methods of every attached model."""
+        for model, name, method in reversed(self._attached):
+            if method:
+                setattr(model, name, method)
+            else:
+                delattr(model, name)  # was a plain method of the class
+        self._attached = []
+
+    def report(self, **extra):
+        """Structured summary of the timers and counters, with `extra` fields added."""
+        # Time spent moving spins: everything but building/resetting models and measuring
+        move_time = sum(t for name, t in self.timers.items()
+                        if name not in ("construct", "reset", "observables", "checkpoint"))
+        report = dict(extra)
+        report.update({
+            "timers": dict(self.timers),
+            "moves": self.moves,
+            "attempted": int(self.attempted),
+            "accepted": int(self.accepted),
+            "acceptance_rate": self.accepted / self.attempted if self.attempted else None,
+            "flips_per_move": self.accepted / self.moves if self.moves else None,
+            "moves_per_s": self.moves / move_time if move_time else None,
+            "flips_per_s": self.accepted / move_time if move_time else None,
+            "histogram": dict(sorted(self.histogram.items())),
+        })
+        return report
@@ -0,0 +1,187 @@
+"""
+nfoldway.py
+Rejection-free (n-fold way / BKL) kinetic Monte Carlo engine.
+
+The engine wraps an existing model (NormalIsing, GraphIsing or DirectedGraphIsing)
+and groups its spins into classes sharing the same (spin, local field), hence the
+same Metropolis flip probability. Instead of proposing moves that are mostly
+rejected at low temperature, it picks the next flip directly from the classes and
+advances a clock counted in Metropolis attempts: the number of attempts before a
+flip is drawn from the geometric law of the single-spin Metropolis dynamics, so
+first-passage times are statistically identical to the `step` counts of `move()`.
+
+Models expose the following site interface:
+- _sites(): list of site keys (lattice index tuples or graph nodes)
+- _dependents(site): sites whose local field contains the spin at `site`
+- _local_field(site): current local field of `site`
+- _flip_rate(spin, field): (flip probability, energy change)
+- _flip_site(site, delta_E): flip and update the model bookkeeping
+Members of `influencer_nodes`, if any, are pinned and never flipped.
+"""
+
+import numpy as np
+
+
+class NFoldWay:
+    """Rejection-free kinetic Monte Carlo engine usable in place of the model."""
+
+    def __init__(self, model):
+        self.model = model
+        self.length_cycle = 1  # one move() = one sweep worth of Metropolis attempts
+        self._sites = list(model._sites())
+        self._index = {site: i for i, site in enumerate(self._sites)}
+        self._dependents = [[self._index[d] for d in model._dependents(site)] for site in self._sites]
+        pinned = getattr(model, "influencer_nodes", ())
+        self._pinned = [site in pinned for site in self._sites]
+        self.attempts_per_move = len(self._sites)
+        self._rebuild()
+
+    def __getattr__(self, name):
+        # Everything not handled by the engine (size, dim, spins, ...) is the model's
+        if name == "model":
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+    # ------------------------------
+    # Model-like interface
+    # ------------------------------
+    @property
+    def beta(self):
+        return self.model.beta
+
+    @beta.setter
+    def beta(self, value):
+        self.model.beta = value
+        self._rates = {}
+
+    @property
+    def h(self):
+        return getattr(self.model, "h", 0)
+
+    @h.setter
+    def h(self, value):
+        self.model.h = value
+        self._rates = {}
+
+    @property
+    def energy(self):
+        return self.model.energy
+
+    @energy.setter
+    def energy(self, value):
+        self.model.energy = value
+
+    @property
+    def magnetization(self):
+        return self.model.magnetization
+
+    @magnetization.setter
+    def magnetization(self, value):
+        self.model.magnetization = value
+
+    def _reset_spin(self, to_value=None):
+        self.model._reset_spin(to_value)
+        self._rebuild()
+
+    def _get_state(self):
+        """Model state plus the clock and class buckets (their order decides the next flips)."""
+        return {'model': self.model._get_state(), 'time': self.time,
+                'spin': list(self._spin), 'field': list(self._field),
+                'buckets': {key: list(bucket) for key, bucket in self._buckets.items()},
+                'key': list(self._key), 'where': list(self._where)}
+
+    def _set_state(self, state):
+        self.model._set_state(state['model'])
+        self._rates = {}
+        self.time = state['time']
+        self._spin = list(state['spin'])
+        self._field = list(state['field'])
+        self._buckets = {key: list(bucket) for key, bucket in state['buckets'].items()}
+        self._key = list(state['key'])
+        self._where = list(state['where'])
+
+    def move(self):
+        """Advance the clock by one sweep (N Metropolis attempts), return the number of flips."""
+        target = self.time + len(self._sites)
+        flipped = 0
+        while self._advance(target) <= target:
+            flipped += 1
+        self.time = target
+        return flipped
+
+    def flip(self):
+        """Perform the next flip and return the clock, in Metropolis attempts (inf if frozen)."""
+        return self._advance(np.inf)
+
+    # ------------------------------
+    # Class bookkeeping
+    # ------------------------------
+    def _rebuild(self):
+        """Rebuild spins, fields and classes from the model state, resetting the clock."""
+        self.time = 0
+        self._rates = {}
+        self._spin = [int(self.model.spins[site]) for site in self._sites]
+        self._field = [int(self.model._local_field(site)) for site in self._sites]
+        self._buckets = {}
+        self._key = [None] * len(self._sites)
+        self._where = [0] * len(self._sites)
+        for i in range(len(self._sites)):
+            if not self._pinned[i]:
+                self._insert(i, (self._spin[i], self._field[i]))
+
+    def _rate(self, key):
+        if key not in self._rates:
+            self._rates[key] = self.model._flip_rate(*key)
+        return self._rates[key]
+
+    def _insert(self, i, key):
+        bucket = self._buckets.setdefault(key, [])
+        self._key[i] = key
+        self._where[i] = len(bucket)
+        bucket.append(i)
+
+    def _remove(self, i):
+        # Swap with the last element so that removal is O(1)
+        bucket = self._buckets[self._key[i]]
+        last = bucket.pop()
+        if last != i:
+            bucket[self._where[i]] = last
+            self._where[last] = self._where[i]
+
+    def _update(self, i):
+        key = (self._spin[i], self._field[i])
+        if key != self._key[i]:
+            self._remove(i)
+            self._insert(i, key)
+
+    def _advance(self, limit):
+        """Flip one spin unless the waiting time runs past `limit`; return the clock."""
+        classes = [(key, len(bucket) * self._rate(key)[0])
+                   for key, bucket in self._buckets.items() if bucket]
+        total = sum(w for _, w in classes)
+        if total <= 0:
+            return np.inf
+        # Attempts needed for the next accepted flip; the law is memoryless, so a
+        # draw past `limit` can be discarded and redrawn on the next call.
+        wait = np.random.geometric(min(total / len(self._sites), 1.0))
+        if self.time + wait > limit:
+            return self.time + wait
+        self.time += wait
+
+        r = np.random.random() * total
+        for key, w in classes:
+            r -= w
+            if r < 0:
+                break
+        bucket = self._buckets[key]
+        i = bucket[np.random.randint(len(bucket))]
+
+        self.model._flip_site(self._sites[i], self._rate(key)[1])
+        self._spin[i] = -self._spin[i]
+        self._update(i)
+        step = 2 * self._spin[i]
+        for j in self._dependents[i]:
+            self._field[j] += step
+            if not self._pinned[j]:
+                self._update(j)
+        return self.time
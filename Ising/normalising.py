@@ -1,8 +1,6 @@
 import numpy as np
 import itertools
-import matplotlib.pyplot as plt
-import matplotlib.animation as animation
-from matplotlib.colors import ListedColormap
+from .observables import lattice_energy
 
 class NormalIsing:
     def __init__(self, T, J, L, dim, h=0, mode="normal", epsilon=0.5, wolff=False):
@@ -20,6 +18,7 @@ class NormalIsing:
         else:
             self.move = self.wolff_move
             self.length_cycle = 1
+            self.attempts_per_move = None  # cluster moves are always accepted
 
     def _reset_spin(self, to_value=None):
         """Réinitialise les spins."""
@@ -46,38 +45,78 @@ class NormalIsing:
 
     def _get_energy(self):
         """Compute the total energy for 2D or 3D Ising configuration."""
-        energ = 0.0
-        for idx in itertools.product(range(self.size), repeat=self.dim):
-                # Only count "forward" neighbors to avoid double counting
-                energ += -self.J * self.spins[idx] * (np.sum(self._get_neighbors(idx, only_forward = True)))
-        energ += - self.h * np.sum(self.spins)
-        return energ
+        return lattice_energy(self.spins, self.J, self.h)
 
     def _get_magnetization(self):
         """Returns the total magnetization"""
         return np.sum(self.spins)
 
+    def _get_observables(self):
+        """Extensive observables tracked during the simulation, read by compute_properties."""
+        return {'M': self.magnetization, 'E': self.energy}
+
+    def _get_state(self):
+        """Full dynamical state, used by checkpoint.py."""
+        return {'spins': self.spins.copy(), 'energy': self.energy,
+                'magnetization': self.magnetization, 'beta': self.beta, 'h': self.h}
+
+    def _set_state(self, state):
+        self.spins = state['spins'].copy()
+        self.energy = state['energy']
+        self.magnetization = state['magnetization']
+        self.beta = state['beta']
+        self.h = state['h']
+
+    # Every move returns the number of spins it flipped (used by instrumentation.py)
     def metropolis_move(self):
         idx = tuple(np.random.randint(self.size, size=self.dim))
         spin = self.spins[idx]
         neighbors = self._get_neighbors(idx)
         total_neighbor = sum(neighbors)
+        prob_flip, delta_energy = self._flip_rate(spin, total_neighbor)
+        if np.random.random() < prob_flip:
+            self._flip_site(idx, delta_energy)
+            return 1
+        return 0
+
+    def _flip_rate(self, spin, total_neighbor):
+        """Flip probability and energy change of a spin given the sum of its neighbours."""
+        delta_energy = 2 * self.J * spin * total_neighbor + 2 * self.h * spin
         if self.mode == 'normal':
             # classical Ising
-            delta_energy = 2 * self.J * spin * total_neighbor + 2 * self.h * spin
             prob_flip = np.exp(-self.beta * delta_energy)
         elif self.mode == 'self_identity':
             if spin * total_neighbor >= 0:  # majority like him
                 # classical Ising
-                delta_energy = 2 * self.J * spin * total_neighbor + 2 * self.h * spin
                 prob_flip = np.exp(-self.beta * delta_energy)
             else:  # majority different
-                delta_energy = 0  # energy ignored in this case
-                prob_flip = 1 - self.epsilon
-        if np.random.random() < prob_flip:
-            self.spins[idx] *= -1
-            self.energy += delta_energy
-            self.magnetization += 2 * self.spins[idx]
+                prob_flip = 1 - self.epsilon  # energy ignored in the acceptance
+        else:
+            raise ValueError("mode must be 'normal' or 'self_identity'")
+        return min(prob_flip, 1.0), delta_energy
+
+    def _flip_site(self, idx, delta_energy):
+        """Flip one spin and update the running energy and magnetization."""
+        self.spins[idx] *= -1
+        self.energy += delta_energy
+        self.magnetization += 2 * self.spins[idx]
+
+    # --- Site interface used by the kinetic engine (see nfoldway.py) ---
+    def _sites(self):
+        return list(itertools.product(range(self.size), repeat=self.dim))
+
+    def _dependents(self, idx):
+        """Sites whose local field contains the spin at idx."""
+        sites = []
+        for d in range(self.dim):
+            for step in (1, -1):
+                neigh = list(idx)
+                neigh[d] = (neigh[d] + step) % self.size
+                sites.append(tuple(neigh))
+        return sites
+
+    def _local_field(self, idx):
+        return sum(self._get_neighbors(idx))
 
     def wolff_move(self):
         p = 1.0 - np.exp(-2.0 * self.beta)
@@ -107,6 +146,7 @@ class NormalIsing:
         self.spins[in_cluster] *= -1
         self.energy = self._get_energy()
         self.magnetization = self._get_magnetization()
+        return int(np.count_nonzero(in_cluster))  # cluster size
 
     def _get_plot_data(self):
         """Return positions and colors for scatter"""
@@ -116,6 +156,9 @@ class NormalIsing:
 
     def run_animation(self, nt=200, interval=100, save_path="ising_animation.gif"):
         """Run animation using matplotlib for 2D and 3D Ising configurations with sliding magnetization"""
+        import matplotlib.pyplot as plt
+        import matplotlib.animation as animation
+        from matplotlib.colors import ListedColormap
         steps, magnet = [], []
         fig = plt.figure()
         if self.dim == 3:
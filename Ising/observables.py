@@ -0,0 +1,55 @@
+"""
+observables.py
+Vectorized observables shared by the lattice and graph models.
+
+Graph models keep a scipy.sparse adjacency matrix A (A[i, j] = 1 for an edge i -> j,
+symmetric for undirected graphs) and a spin vector s in node order, so that
+energies and local fields are computed with sparse matrix products instead of
+Python loops over the edges.
+"""
+
+import numpy as np
+
+
+def adjacency_matrix(G, nodes=None, self_loops=True):
+    """
+    Sparse CSR adjacency of G in the order of `nodes` (directed if G is directed).
+    With self_loops=False, edges from a node to itself are left out.
+    """
+    import scipy.sparse as sp
+    if nodes is None:
+        nodes = list(G.nodes)
+    index = {node: i for i, node in enumerate(nodes)}
+    edges = [(i, j) for i, j in G.edges if self_loops or i != j]
+    rows = [index[i] for i, j in edges]
+    cols = [index[j] for i, j in edges]
+    if not G.is_directed():
+        rows, cols = rows + cols, cols + rows
+    data = np.ones(len(rows))
+    return sp.csr_matrix((data, (rows, cols)), shape=(len(nodes), len(nodes)))
+
+
+def spin_vector(spins, nodes):
+    """Spins of a {node: spin} dict as a float vector in the order of `nodes`."""
+    return np.fromiter((spins[node] for node in nodes), dtype=float, count=len(nodes))
+
+
+def local_fields(A, s, incoming=False):
+    """Sum of neighbour spins of every node (of predecessors if incoming=True)."""
+    if incoming:
+        return A.T @ s
+    return A @ s
+
+
+def graph_energy(A, s, J=1.0, directed=False):
+    """Coupling energy -J sum_<ij> s_i s_j, i.e. -J/2 s^T A s (-J s^T A s if directed)."""
+    E = -J * (s @ (A @ s))
+    return E if directed else 0.5 * E
+
+
+def lattice_energy(spins, J=1.0, h=0.0):
+    """Energy of a periodic hypercubic configuration, counting forward neighbours only."""
+    E = 0.0
+    for d in range(spins.ndim):
+        E += -J * np.sum(spins * np.roll(spins, -1, axis=d))
+    return E - h * np.sum(spins)
@@ -0,0 +1,38 @@
+"""
+plotting.py
+Plots of the thermodynamic properties returned by compute_properties.
+"""
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+
+def plot_properties(var_name, results, save_path="thermal_properties.png"):
+    """Plot <M>, χ, and C vs T and save as an image."""
+    x_axis = results[var_name]
+
+    plt.figure(figsize=(8, 6))
+    plt.plot(x_axis, [elem/np.max(np.abs(results['M'])) for elem in results['M']], '+-b', label='<|M|>')
+    plt.plot(x_axis, [elem/np.max(np.abs(results['E'])) for elem in results['E']], '+-m', label='<E>')
+    plt.plot(x_axis, [elem/np.max(np.abs(results['chi'])) for elem in results['chi']], '+-g', label='χ (susceptibility)')
+    plt.plot(x_axis, [elem/np.max(np.abs(results['C'])) for elem in results['C']], '+-r', label='C (specific heat)')
+
+    plt.xlabel('Temperature (T)' if var_name == 'T' else 'Magnetic field (h)')
+    plt.ylabel('Arbitrary scale')
+    plt.title('Thermal Properties vs Temperature')
+    plt.legend()
+    plt.grid(True)
+    plt.tight_layout()
+
+    # Save to file
+    plt.savefig(save_path)
+    plt.close()  # Close the figure to avoid showing it inline
+
+    # Display in notebook (only when running under IPython)
+    try:
+        from IPython import get_ipython
+        from IPython.display import Image, display
+    except ImportError:
+        return
+    if get_ipython() is not None:
+        display(Image(filename=save_path))
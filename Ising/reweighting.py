@@ -0,0 +1,180 @@
+"""
+reweighting.py
+Histogram reweighting of recorded time series and finite-size-scaling helpers.
+
+compute_properties(..., var_name='T', record_series=True) stores, for every
+simulated temperature, the time series of the extensive observables (E, M, ...).
+From them, single_histogram and multi_histogram (Ferrenberg-Swendsen) estimate
+<|M|>, <E>, chi and C, normalised as in compute_properties, at temperatures that
+were not simulated, and the Binder cumulant U4 = 1 - <M^4> / (3 <M^2>^2).
+Both return a results dict that plot_properties can display.
+
+The reweighted temperatures should stay within the range covered by the energy
+histograms: far from it, the estimates are dominated by a handful of samples.
+The finite-size-scaling helpers take such curves for several sizes L
+({L: results}) and estimate Tc and exponent ratios.
+"""
+
+import numpy as np
+
+
+def _logsumexp(a, axis=None):
+    top = np.max(a, axis=axis, keepdims=True)
+    return np.squeeze(top, axis=axis) + np.log(np.sum(np.exp(a - top), axis=axis))
+
+
+def _check_series(series):
+    if not series:
+        raise ValueError("No time series: run compute_properties with record_series=True")
+    N = series[0]['N']
+    if any(point['N'] != N for point in series):
+        raise ValueError("All time series must come from systems of the same size")
+    return N
+
+
+def _averages(data, log_weights, T, N):
+    """Observables at temperature T from samples `data` with unnormalised log weights."""
+    w = np.exp(log_weights - _logsumexp(log_weights))
+    averages = {'T': T}
+    for name, x in data.items():
+        if name.startswith('M'):
+            x = np.abs(x)
+        av_x, av_x2 = np.dot(w, x), np.dot(w, x**2)
+        averages[name] = av_x / N
+        if name == 'E':
+            averages['C'] = (av_x2 - av_x**2) / (N * T**2)
+        elif name.startswith('M'):
+            averages['chi' + name[1:]] = (av_x2 - av_x**2) / (N * T)
+    if 'M' in data:
+        m2, m4 = np.dot(w, data['M']**2), np.dot(w, data['M']**4)
+        averages['U4'] = 1.0 - m4 / (3.0 * m2**2)
+    return averages
+
+
+def _collect(points, temperatures):
+    results = {}
+    for averages in points:
+        for name, value in averages.items():
+            results.setdefault(name, []).append(value)
+    results['T'] = list(temperatures)
+    return results
+
+
+def single_histogram(series, temperatures):
+    """
+    Reweight each target temperature from the closest simulated one.
+
+    series is results['series'] of compute_properties; returns a results dict with
+    'T', 'M', 'E', 'chi', 'C', 'U4' (and chi_A... for the other M observables).
+    """
+    N = _check_series(series)
+    betas = np.array([point['beta'] for point in series])
+    points = []
+    for T in temperatures:
+        point = series[int(np.argmin(np.abs(betas - 1.0 / T)))]
+        data = point['data']
+        log_weights = -(1.0 / T - point['beta']) * data['E']
+        points.append(_averages(data, log_weights, T, N))
+    return _collect(points, temperatures)
+
+
+def free_energies(series, tol=1e-10, max_iter=10000):
+    """
+    Solve the Ferrenberg-Swendsen equations for the dimensionless free energies
+    f_k = -log Z(beta_k) of the simulated points (up to a constant, f_0 = 0).
+    """
+    _check_series(series)
+    betas = np.array([point['beta'] for point in series])
+    E = np.concatenate([point['data']['E'] for point in series])
+    log_n = np.log([len(point['data']['E']) for point in series])
+    f = np.zeros(len(series))
+    for _ in range(max_iter):
+        log_denominator = _logsumexp(log_n[:, None] - np.outer(betas, E) + f[:, None], axis=0)
+        new_f = -_logsumexp(-np.outer(betas, E) - log_denominator[None, :], axis=1)
+        new_f -= new_f[0]
+        if np.max(np.abs(new_f - f)) < tol:
+            return new_f
+        f = new_f
+    raise ValueError(f"Ferrenberg-Swendsen iteration did not converge in {max_iter} steps")
+
+
+def multi_histogram(series, temperatures, tol=1e-10, max_iter=10000):
+    """
+    Ferrenberg-Swendsen multiple-histogram estimate at each target temperature,
+    combining the time series of every simulated point.
+
+    series is results['series'] of compute_properties; returns a results dict with
+    'T', 'M', 'E', 'chi', 'C', 'U4' (and chi_A... for the other M observables).
+    Samples are weighted as if uncorrelated: measure every few sweeps if the
+    autocorrelation time is long.
+    """
+    N = _check_series(series)
+    f = free_energies(series, tol=tol, max_iter=max_iter)
+    betas = np.array([point['beta'] for point in series])
+    log_n = np.log([len(point['data']['E']) for point in series])
+    data = {name: np.concatenate([point['data'][name] for point in series])
+            for name in series[0]['data']}
+    log_denominator = _logsumexp(log_n[:, None] - np.outer(betas, data['E']) + f[:, None], axis=0)
+    points = [_averages(data, -data['E'] / T - log_denominator, T, N) for T in temperatures]
+    return _collect(points, temperatures)
+
+
+# ------------------------------
+# Finite-size scaling
+# ------------------------------
+def binder_crossing(curves):
+    """
+    Estimate Tc from the crossings of the Binder cumulant U4(T) of successive sizes.
+
+    curves maps L to a results dict with 'T' and 'U4' on the same temperature grid
+    (e.g. multi_histogram of each size). Returns {'pairs': {(L1, L2): Tc}, 'Tc': mean}.
+    """
+    sizes = sorted(curves)
+    if len(sizes) < 2:
+        raise ValueError("At least two sizes are needed")
+    pairs = {}
+    for L1, L2 in zip(sizes, sizes[1:]):
+        T = np.asarray(curves[L1]['T'], dtype=float)
+        diff = np.asarray(curves[L1]['U4']) - np.asarray(curves[L2]['U4'])
+        change = np.nonzero(np.sign(diff[:-1]) != np.sign(diff[1:]))[0]
+        if len(change) == 0:
+            continue
+        k = change[0]
+        # Linear interpolation of the crossing between T[k] and T[k + 1]
+        pairs[(L1, L2)] = float(T[k] - diff[k] * (T[k + 1] - T[k]) / (diff[k + 1] - diff[k]))
+    if not pairs:
+        raise ValueError("The Binder cumulants do not cross in the temperature range")
+    return {'pairs': pairs, 'Tc': float(np.mean(list(pairs.values())))}
+
+
+def peak_scaling(curves, key='chi'):
+    """
+    Position and height of the peak of `key` (chi, C...) for every size, and the
+    exponent of the power law peak ~ L^x (x = gamma/nu for chi, alpha/nu for C).
+
+    curves maps L to a results dict with 'T' and `key`. Returns a dict with 'L',
+    'T_peak', 'peak' (lists ordered by L) and 'exponent'.
+    """
+    sizes = sorted(curves)
+    T_peak, peak = [], []
+    for L in sizes:
+        values = np.asarray(curves[L][key])
+        k = int(np.argmax(values))
+        T_peak.append(curves[L]['T'][k])
+        peak.append(values[k])
+    exponent = np.polyfit(np.log(sizes), np.log(peak), 1)[0] if len(sizes) > 1 else None
+    return {'L': sizes, 'T_peak': T_peak, 'peak': peak, 'exponent': exponent}
+
+
+def scaling_collapse(curves, Tc, nu, exponent, key='chi'):
+    """
+    Rescaled curves x = (T - Tc) L^(1/nu), y = O L^(-exponent) for every size;
+    they fall on a single curve for the right Tc, nu and exponent (e.g. gamma/nu).
+    Returns {L: (x, y)}.
+    """
+    collapse = {}
+    for L, results in curves.items():
+        x = (np.asarray(results['T'], dtype=float) - Tc) * L ** (1.0 / nu)
+        y = np.asarray(results[key], dtype=float) * L ** (-exponent)
+        collapse[L] = (x, y)
+    return collapse
@@ -0,0 +1,168 @@
+"""
+screening.py
+Batched screening of influencer sets for rumor propagation on a graph.
+
+For every candidate set of influencers, screen_influencers runs n_replicas
+independent copies of the GraphIsing rumor dynamics at once: influencers pinned
+to +1, every other node starting at -1, random sequential Metropolis steps
+(one step = one GraphIsing.move, picks of influencers included). The graph is
+compiled once into a dense adjacency matrix; each replica keeps the local fields
+of its nodes up to date, so one step of all replicas costs a few NumPy
+operations plus O(N) per accepted flip. The dense matrix limits this to graphs
+of a few thousand nodes, which covers the student network; it is sent once to
+each worker process, the jobs only carry the pinned nodes.
+
+The spread time of a replica is the first step at which the magnetization per
+spin M/N exceeds `threshold`; steps are counted as in iterations_to_threshold
+(0 if the pinned set alone is above the threshold). Note that
+iterations_to_threshold compares M * (1/size)**2 instead, so for graphs the same
+`threshold` value does not give the same times. Candidates run in a process pool
+(n_jobs), each with its own seed.
+
+influencer_candidates builds the usual candidate sets from a StudentGraph:
+members of associations, top-k nodes by centrality and size-matched random controls.
+"""
+
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .observables import adjacency_matrix
+
+
+def influencer_candidates(studentgraph, associations=None, top_k=(), centralities=("degree",), n_random=0,
+                          seed=None):
+    """
+    Candidate influencer sets {name: list of nodes} on the built graph of `studentgraph`.
+
+    - "asso:<name>": members of each association (default: associations_a_garder),
+      read in a single pass over the DataFrame
+    - "<centrality>:top<k>": the k most central nodes, for each k in top_k and each
+      networkx centrality name in centralities ("degree", "betweenness", "eigenvector"...)
+    - "random:<size>:<i>": n_random random sets of each size used above (controls)
+    """
+    import networkx as nx
+
+    G = studentgraph.G
+    if associations is None:
+        associations = studentgraph.associations_a_garder
+    rng = np.random.RandomState(seed)
+    candidates = {}
+
+    members = defaultdict(list)
+    for student, assos in zip(studentgraph.df[studentgraph.nom_colonne_eleve], studentgraph.df["liste_assos"]):
+        for asso in assos:
+            if asso in associations and student in G:
+                members[asso].append(student)
+    for asso in associations:
+        candidates[f"asso:{asso}"] = members[asso]
+
+    for name in centralities:
+        scores = getattr(nx, f"{name}_centrality")(G)
+        ranking = sorted(scores, key=scores.get, reverse=True)
+        for k in top_k:
+            candidates[f"{name}:top{k}"] = ranking[:k]
+
+    nodes = list(G.nodes)
+    for size in sorted({len(c) for c in candidates.values() if c}):
+        for i in range(n_random):
+            picks = rng.choice(len(nodes), size=size, replace=False)
+            candidates[f"random:{size}:{i}"] = [nodes[j] for j in picks]
+    return candidates
+
+
+def compile_graph(G):
+    """Node order and dense integer adjacency matrix of G (without self-loops, as GraphIsing)."""
+    nodes = list(G.nodes)
+    return nodes, adjacency_matrix(G, nodes, self_loops=False).toarray().astype(np.int32)
+
+
+def _spread(A, pinned, T, J, h, n_replicas, max_step, threshold, seed, chunk=1024):
+    """Run n_replicas copies of the rumor dynamics; return (spread times, reached, final M per spin)."""
+    np.random.seed(seed)
+    N = len(A)
+    beta = 1.0 / T
+    s = np.tile(np.where(pinned, 1, -1).astype(np.int32), (n_replicas, 1))
+    F = s @ A  # local fields (sum of neighbour spins), one row per replica
+    M = s.sum(axis=1)
+    rows = np.arange(n_replicas)
+    # Pinned sets already above the threshold spread at once, as iterations_to_threshold reports 0
+    reached = M > threshold * N
+    times = np.where(reached, 0, max_step)
+    for start in range(0, max_step, chunk):
+        # Random numbers are drawn by blocks of steps to keep the Python overhead low
+        sites = np.random.randint(N, size=(min(chunk, max_step - start), n_replicas))
+        draws = np.random.random(sites.shape)
+        for k in range(len(sites)):
+            i = sites[k]
+            spin = s[rows, i]
+            delta_E = 2 * spin * (J * F[rows, i] + h)
+            accept = ~pinned[i] & (draws[k] < np.exp(-beta * np.maximum(delta_E, 0)))
+            if accept.any():
+                r, j = rows[accept], i[accept]
+                s[r, j] = -spin[accept]
+                M[r] += 2 * s[r, j]
+                F[r] += 2 * s[r, j][:, None] * A[j]
+                hit = ~reached & (M > threshold * N)
+                times[hit] = start + k
+                reached |= hit
+    return times, reached, M / N
+
+
+_A = None  # adjacency matrix of the graph being screened, set once per worker process
+
+
+def _share_graph(A):
+    global _A
+    _A = A
+
+
+def _screen_candidate(args):
+    name, pinned, T, J, h, n_replicas, max_step, threshold, seed = args
+    times, reached, M_final = _spread(_A, pinned, T, J, h, n_replicas, max_step, threshold, seed)
+    reached_times = times[reached]
+    return name, {
+        'influencers': int(pinned.sum()),
+        'times': times,
+        'reached': reached,
+        'M_final': M_final,
+        'fraction_reached': float(reached.mean()),
+        'mean_time': float(reached_times.mean()) if len(reached_times) else np.nan,
+        'median_time': float(np.median(reached_times)) if len(reached_times) else np.nan,
+    }
+
+
+def screen_influencers(G, candidates, T=2.0, J=1.0, h=0, n_replicas=100, max_step=100000, threshold=0.0,
+                       seed=None, n_jobs=1):
+    """
+    Spread-time distributions and final magnetization for each candidate influencer set.
+
+    candidates maps names to iterables of nodes (see influencer_candidates); nodes
+    that are not in G are ignored. Every candidate runs n_replicas replicas for
+    max_step steps. Returns {name: {'influencers', 'times' (max_step where the
+    threshold was never reached), 'reached', 'M_final' (per replica, after max_step
+    steps), 'fraction_reached', 'mean_time', 'median_time' (over replicas that
+    reached the threshold)}}. Candidate c is seeded with seed + c (seeds drawn from
+    np.random if seed is None).
+    """
+    nodes, A = compile_graph(G)
+    index = {node: i for i, node in enumerate(nodes)}
+    seeds = (np.random.randint(2**31, size=len(candidates)) if seed is None
+             else seed + np.arange(len(candidates)))
+    jobs = []
+    for c, (name, members) in enumerate(candidates.items()):
+        pinned = np.zeros(len(nodes), dtype=bool)
+        pinned[[index[node] for node in members if node in index]] = True
+        jobs.append((name, pinned, T, J, h, n_replicas, max_step, threshold, int(seeds[c])))
+    # The matrix is sent once to each worker, not pickled into every job
+    if n_jobs == 1:
+        _share_graph(A)
+        try:
+            screened = [_screen_candidate(job) for job in jobs]
+        finally:
+            _share_graph(None)
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_share_graph, initargs=(A,)) as pool:
+            screened = list(pool.map(_screen_candidate, jobs))
+    return dict(screened)
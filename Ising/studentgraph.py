@@ -1,6 +1,5 @@
 import pandas as pd
 import networkx as nx
-import plotly.graph_objects as go
 from collections import defaultdict
 
 class StudentGraph:
@@ -85,6 +84,8 @@ class StudentGraph:
         """
         Plots the graph with Plotly.
         """
+        import plotly.graph_objects as go
+
         if self.G.number_of_nodes() == 0:
             print("Aucun nœud à afficher.")
             return
@@ -1,166 +1,187 @@
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.animation as animation
-from IPython.display import Image, display
-from tqdm import tqdm
-from scipy.optimize import curve_fit
+from contextlib import nullcontext
+from .instrumentation import Instrumentation
 
-def compute_properties(model, var_name, var_value, n_warmup=1000, n_cycles=100, n_average = 1, reset_state=True):
+
+def __getattr__(name):
+    # Kept importable from here for backward compatibility, loaded on first use
+    if name == "plot_properties":
+        from .plotting import plot_properties
+        return plot_properties
+    if name == "compute_critical_exponents":
+        from .fitting import compute_critical_exponents
+        return compute_critical_exponents
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _progress(iterable, **kwargs):
+    """Wrap an iterable in a tqdm progress bar, importing tqdm on first use."""
+    try:
+        from tqdm import tqdm
+    except ImportError:
+        return iterable
+    return tqdm(iterable, **kwargs)
+
+
+def _no_phase(name):
+    return nullcontext()
+
+def compute_properties(model, var_name, var_value, n_warmup=1000, n_cycles=100, n_average = 1, reset_state=True,
+                       instrument=False, callback=None, checkpoint=None, record_series=False):
     """
     Compute <M>, <E>, χ, and C vs T or h using a Monte Carlo simulation
     with warm-up and measurement cycles, showing progress with tqdm.
+
+    Observables are read from model._get_observables(): every magnetization
+    ('M', or layer-resolved 'M_A', 'M_B', ...) gives its average and its
+    susceptibility ('chi', 'chi_A', ...), 'E' gives <E> and C, and any other
+    observable (e.g. the overlap 'Q' of the dual model) is simply averaged.
+
+    With instrument=True, results['reports'] holds one Instrumentation report per
+    scan point (time spent in reset/warmup/measurement/observables, attempted and
+    accepted flips, flips-per-move histogram, moves/s). If a callback is given, each
+    report is passed to callback(report) as soon as the point is done, instead of
+    showing a tqdm progress bar.
+
+    With checkpoint=Checkpoint(path), the scan is saved periodically and after each
+    point; calling compute_properties again with the same arguments resumes it.
+
+    With record_series=True, results['series'] holds for every point the time series
+    of the observables ({'beta', 'N', 'data': {name: array}}), as consumed by the
+    histogram reweighting of reweighting.py.
     """
     results = {var_name: var_value, 'M': [], 'E': [], 'chi': [], 'C': []}
     N = model.size ** model.dim  # total number of spins
 
+    if var_name not in ('T', 'h'):
+        raise ValueError("var_name must be 'T' or 'h'")
     if not reset_state:
         n_average = 1  # Disable averaging if not resetting state
-
-    for var in tqdm(results[var_name], desc="Computing  properties"):
+    if instrument:
+        results['reports'] = []
+    if record_series:
+        results['series'] = []
+
+    # Position in the scan: (point, average, warm-up sweeps done, measurement cycles done)
+    position, sums, trace = (0, 0, 0, 0), {}, {}
+    if checkpoint:
+        run = {'function': 'compute_properties', 'var_name': var_name, 'var_value': list(var_value),
+               'n_warmup': n_warmup, 'n_cycles': n_cycles, 'n_average': n_average,
+               'reset_state': reset_state, 'record_series': record_series, 'model': _model_signature(model)}
+        state = checkpoint.load()
+        if state is not None:
+            checkpoint.check(state, run)
+            results, sums, position = state['results'], state['sums'], state['position']
+            trace = state['trace']
+            results[var_name] = var_value
+            model._set_state(state['model'])
+            np.random.set_state(state['rng'])
+
+    def save(position):
+        checkpoint.save({'run': run, 'results': results, 'sums': sums, 'trace': trace, 'position': position,
+                         'model': model._get_state(), 'rng': np.random.get_state()})
+
+    scan = results[var_name] if callback else _progress(results[var_name], desc="Computing  properties")
+    for i, var in enumerate(scan):
+        if i < position[0]:
+            continue  # already computed
+        a_start, w_start, c_start = position[1:] if i == position[0] else (0, 0, 0)
         if var_name == 'T':
             model.beta = 1. / var
-        elif var_name == 'h':
-            model.h = var
         else:
-            raise ValueError("var_name must be 'T' or 'h'")
-        av_m, av_m2, av_e, av_e2 = 0, 0, 0, 0
-        
-        for _ in range(n_average):
-            # --- Warm-up phase ---
-            if reset_state:
-                model._reset_spin()
-                model.energy = model._get_energy()
-                model.magnetization = model._get_magnetization()
-
-            for _ in range(n_warmup * model.length_cycle):
-                model.move()
-
-            # --- Measurement phase ---
-            
-            for _ in range(n_cycles):
-                # Perform one MC sweep (N updates)
-                for _ in range(model.length_cycle):
-                    model.move()
-
-                # Accumulate averages
-                m = model._get_magnetization()
-                e = model._get_energy()
-                if var_name == 'T':
-                    av_m += np.abs(m)
-                elif var_name == 'h':
-                    av_m += m
-                else:
-                    raise ValueError("var_name must be 'T' or 'h'")
-                av_m2 += m**2
-                av_e += e
-                av_e2 += e**2
-
-        # Normalize averages
-        av_m /= n_cycles * n_average
-        av_m2 /= n_cycles * n_average
-        av_e /= n_cycles * n_average
-        av_e2 /= n_cycles * n_average
+            model.h = var
+        if (i, a_start, w_start, c_start) != position or position[1:] == (0, 0, 0):
+            sums = {}  # observable -> [sum of x, sum of x**2]
+            trace = {}  # observable -> measured values, if record_series
+        stats = Instrumentation() if (instrument or callback) else None
+        if stats:
+            stats.attach(model)
+        phase = stats.phase if stats else _no_phase
+
+        try:
+            for a in range(a_start, n_average):
+                if a != a_start:
+                    w_start, c_start = 0, 0
+                # --- Warm-up phase ---
+                if reset_state and w_start == 0 and c_start == 0:
+                    with phase('reset'):
+                        model._reset_spin()
+
+                for w in range(w_start, n_warmup):
+                    with phase('warmup'):
+                        for _ in range(model.length_cycle):
+                            model.move()
+                    if checkpoint and checkpoint.due():
+                        with phase('checkpoint'):
+                            save((i, a, w + 1, 0))
+
+                # --- Measurement phase ---
+
+                for c in range(c_start, n_cycles):
+                    # Perform one MC sweep (N updates)
+                    with phase('measurement'):
+                        for _ in range(model.length_cycle):
+                            model.move()
+
+                    # Accumulate averages
+                    with phase('observables'):
+                        observables = model._get_observables()
+                        if record_series:
+                            for name, x in observables.items():
+                                trace.setdefault(name, []).append(x)
+                        for name, x in observables.items():
+                            if name.startswith('M') and var_name == 'T':
+                                x = np.abs(x)
+                            acc = sums.setdefault(name, [0, 0])
+                            acc[0] += x
+                            acc[1] += x**2
+                    if checkpoint and checkpoint.due():
+                        with phase('checkpoint'):
+                            save((i, a, n_warmup, c + 1))
+        finally:
+            # Restore model.move even if a run is interrupted
+            if stats:
+                stats.detach()
 
         fact = 1.0 / N
         T = 1. / model.beta
         k_B = 1.0
 
-        # Store results
-        if var_name=="h":
-            results['M'].append(fact * av_m)
-        elif var_name=="T":
-            results['M'].append(fact * av_m)
-        results['E'].append(fact * av_e)
-        results['C'].append((fact * (av_e2 - av_e**2) / (k_B * T**2)))
-        results['chi'].append(fact * (av_m2 - av_m**2) / (k_B * T))
+        # Normalize averages and store results
+        for name, (av_x, av_x2) in sums.items():
+            av_x /= n_cycles * n_average
+            av_x2 /= n_cycles * n_average
+            results.setdefault(name, []).append(fact * av_x)
+            if name == 'E':
+                results['C'].append((fact * (av_x2 - av_x**2) / (k_B * T**2)))
+            elif name.startswith('M'):
+                results.setdefault('chi' + name[1:], []).append(fact * (av_x2 - av_x**2) / (k_B * T))
+
+        if record_series:
+            results['series'].append({'beta': model.beta, 'N': N,
+                                      'data': {name: np.array(x) for name, x in trace.items()}})
+
+        if stats:
+            report = stats.report(**{var_name: var}, n_warmup=n_warmup, n_cycles=n_cycles, n_average=n_average)
+            if instrument:
+                results['reports'].append(report)
+            if callback:
+                callback(report)
+        if checkpoint:
+            save((i + 1, 0, 0, 0))
 
     return results
 
 
-def plot_properties(var_name, results, save_path="thermal_properties.png"):
-    """Plot <M>, χ, and C vs T and save as an image."""
-    x_axis = results[var_name]
-
-    plt.figure(figsize=(8, 6))
-    plt.plot(x_axis, [elem/np.max(np.abs(results['M'])) for elem in results['M']], '+-b', label='<|M|>')
-    plt.plot(x_axis, [elem/np.max(np.abs(results['E'])) for elem in results['E']], '+-m', label='<E>')
-    plt.plot(x_axis, [elem/np.max(np.abs(results['chi'])) for elem in results['chi']], '+-g', label='χ (susceptibility)')
-    plt.plot(x_axis, [elem/np.max(np.abs(results['C'])) for elem in results['C']], '+-r', label='C (specific heat)')
-
-    plt.xlabel('Temperature (T)' if var_name == 'T' else 'Magnetic field (h)')
-    plt.ylabel('Arbitrary scale')
-    plt.title('Thermal Properties vs Temperature')
-    plt.legend()
-    plt.grid(True)
-    plt.tight_layout()
-
-    # Save to file
-    plt.savefig(save_path)
-    plt.close()  # Close the figure to avoid showing it inline
-
-    # Display in notebook
-    display(Image(filename=save_path))
-
-
-def compute_critical_exponents(results, Tc_guess):
-    """
-    Fit critical exponents β, γ, α from Monte Carlo results near a given Tc.
-
-    Parameters
-    ----------
-    results : dict with keys 'T', 'M', 'chi', 'C'
-    Tc_guess : float that estimate of the critical temperature.
-
-    Returns
-    -------
-    dict
-        Dictionary containing:
-        - Fitted critical temperatures: 'Tc_M', 'Tc_chi', 'Tc_C'
-        - Critical exponents: 'beta', 'gamma', 'alpha'
-        - Amplitudes: 'A_M', 'A_chi', 'A_C'
-    """
-
-    T = np.array(results['T'])
-    M = np.array(results['M'])
-    chi = np.array(results['chi'])
-    C = np.array(results['C'])
-
-    # --- Define power-law functions for fitting ---
-    def M_law(T, Tc, beta, A):
-        return A * np.abs(Tc - T)**beta
-
-    def chi_law(T, Tc, gamma, A):
-        return A * np.abs(T - Tc)**(-gamma)
-
-    def C_law(T, Tc, alpha, A):
-        return A * np.abs(T - Tc)**(-alpha)
-
-    # --- Fit magnetization for T < Tc ---
-    mask_M = T < Tc_guess
-    popt_M, _ = curve_fit(M_law, T[mask_M], M[mask_M],
-                          p0=[Tc_guess, 0.125, 1.0], maxfev=5000)
-    Tc_fit_M, beta_fit, A_M = popt_M
-
-    # --- Fit susceptibility around Tc ---
-    mask_chi = (T > 0.9*Tc_guess) & (T < 1.1*Tc_guess)
-    popt_chi, _ = curve_fit(chi_law, T[mask_chi], chi[mask_chi],
-                            p0=[Tc_guess, 1.75, 1.0], maxfev=5000)
-    Tc_fit_chi, gamma_fit, A_chi = popt_chi
-
-    # --- Fit specific heat around Tc ---
-    mask_C = (T > 0.9*Tc_guess) & (T < 1.1*Tc_guess)
-    popt_C, _ = curve_fit(C_law, T[mask_C], C[mask_C],
-                           p0=[Tc_guess, 0.0, 1.0], maxfev=5000)
-    Tc_fit_C, alpha_fit, A_C = popt_C
-
-    # --- Combine results into a dictionary ---
-    results_exponents = {
-        'Tc_M': Tc_fit_M, 'beta': beta_fit, 'A_M': A_M,
-        'Tc_chi': Tc_fit_chi, 'gamma': gamma_fit, 'A_chi': A_chi,
-        'Tc_C': Tc_fit_C, 'alpha': alpha_fit, 'A_C': A_C
-    }
-
-    return results_exponents
+def _model_signature(model):
+    """What a checkpoint of compute_properties must match: engine, model type and parameters."""
+    base = getattr(model, 'model', None) or model  # model wrapped by an engine (NFoldWay)
+    signature = {'engine': type(model).__name__, 'model': type(base).__name__,
+                 'move': getattr(model.move, '__name__', None), 'size': base.size, 'dim': base.dim}
+    for name in ('J', 'J_A', 'J_B', 'C', 'mode', 'epsilon', 'local_fields', 'G', 'influencer_nodes'):
+        if name in vars(base):
+            signature[name] = getattr(base, name)
+    return signature
 
 
 def get_members_of_association(studentgraph, association):
@@ -171,13 +192,55 @@ def get_members_of_association(studentgraph, association):
         if association in row["liste_assos"]
     ]
 
-def iterations_to_threshold(class_model, var_name, var_values, kargs, iter_per_value, max_step, threshold = None):
+def iterations_to_threshold(class_model, var_name, var_values, kargs, iter_per_value, max_step, threshold = None,
+                            instrument=False, callback=None, checkpoint=None):
+    """
+    Number of steps needed by the magnetization to reach `threshold`, for each value of
+    `var_name` and `iter_per_value` freshly built models.
+
+    With instrument=True, returns (results, reports) where reports maps each value to
+    an Instrumentation report (time spent building models and running them, attempted
+    and accepted flips, moves/s). If a callback is given, each report is passed to
+    callback(report) instead of showing tqdm progress bars.
+
+    With checkpoint=Checkpoint(path), progress is saved between iterations; calling
+    iterations_to_threshold again with the same arguments resumes it.
+    """
     results = {}
-    for var in tqdm(var_values, desc=f"Progress over {var_name}"):
-        results[var] = []
+    reports = {}
+    # Position: (value index, iterations done for that value)
+    position = (0, 0)
+    if checkpoint:
+        run = {'function': 'iterations_to_threshold', 'var_name': var_name, 'var_values': list(var_values),
+               'kargs': kargs, 'iter_per_value': iter_per_value, 'max_step': max_step,
+               'class_model': class_model, 'threshold': threshold}
+        state = checkpoint.load()
+        if state is not None:
+            checkpoint.check(state, run)
+            results, reports, threshold = state['results'], state['reports'], state['threshold']
+            position = state['position']
+            np.random.set_state(state['rng'])
+
+    def save(position):
+        checkpoint.save({'run': run, 'results': results, 'reports': reports, 'threshold': threshold,
+                         'position': position, 'rng': np.random.get_state()})
+
+    scan = var_values if callback else _progress(var_values, desc=f"Progress over {var_name}")
+    for v, var in enumerate(scan):
+        if v < position[0]:
+            continue  # already computed
+        start = position[1] if v == position[0] else 0
+        if start == 0:
+            results[var] = []
         all_args = {**{var_name: var}, **kargs}
-        for _ in tqdm(range(iter_per_value), desc=f"  Iterations for {var_name}={var}", leave=False):
-            model = class_model(**all_args)
+        stats = Instrumentation() if (instrument or callback) else None
+        phase = stats.phase if stats else _no_phase
+        iterations = range(start, iter_per_value)
+        if not callback:
+            iterations = _progress(iterations, desc=f"  Iterations for {var_name}={var}", leave=False)
+        for it in iterations:
+            with phase('construct'):
+                model = class_model(**all_args)
             if var_name == 'h' and not threshold:
                 threshold = 2*(4* np.pi / (var*model.size)**2) -1
                 model._reset_spin(to_value=-1)
@@ -185,13 +248,43 @@ def iterations_to_threshold(class_model, var_name, var_values, kargs, iter_per_v
                 numerator = 2 - var * np.log(np.cosh(2/var) / np.sinh(2/var))
                 denominator = 0.4 * (1 - np.sinh(2/var)**(-4))**(1/8)
                 threshold = (np.pi / model.size**2) * (numerator / denominator)**2
+            if stats:
+                stats.attach(model, max_time=max_step)
             #threshold_reached = False
             inv_size = 1.0 / model.size
-            for step in range(max_step):
-                model.move()
-                m = model.magnetization * inv_size ** 2
-                if m > threshold:
-                    #threshold_reached = True
-                    break
+            try:
+                with phase('run'):
+                    if hasattr(model, "flip"):
+                        # Rejection-free engine: jump from flip to flip, the clock counts Metropolis steps.
+                        # Already above the threshold (e.g. pinned influencers): step 0, as the
+                        # Metropolis loop reports, even if nothing can flip.
+                        step = 0
+                        while model.magnetization * inv_size ** 2 <= threshold:
+                            t = model.flip()
+                            if t > max_step:
+                                step = max_step - 1
+                                break
+                            step = int(t) - 1
+                    else:
+                        for step in range(max_step):
+                            model.move()
+                            m = model.magnetization * inv_size ** 2
+                            if m > threshold:
+                                #threshold_reached = True
+                                break
+            finally:
+                if stats:
+                    stats.detach()
             results[var].append(step)
+            if checkpoint and checkpoint.due():
+                save((v, it + 1))
+        if stats:
+            reports[var] = stats.report(**{var_name: var}, iterations=iter_per_value,
+                                        mean_steps=float(np.mean(results[var])))
+            if callback:
+                callback(reports[var])
+        if checkpoint:
+            save((v + 1, 0))
+    if instrument:
+        return results, reports
     return results
@@ -0,0 +1,142 @@
+"""
+wanglandau.py
+Wang-Landau flat-histogram estimate of the density of states g(E) (or g(E, M)).
+
+The engine wraps a NormalIsing or a (small) GraphIsing model and reuses its
+single-spin site interface (see nfoldway.py): a random spin flip of energy change
+delta_E (from model._flip_rate) is accepted with probability
+min(1, g(E) / g(E + delta_E)) and applied with model._flip_site, which keeps the
+model energy and magnetization up to date. Every visited level has its log g
+raised by log f; once the histogram of visits is flat, f is replaced by sqrt(f),
+until log f < log_f_final.
+
+A single run gives the thermodynamics at every temperature: properties(T) returns
+a results dict (M, E, chi, C, plus the Binder cumulant U4 and the free energy F per
+spin) that plot_properties can display. With g(E) only, the magnetization curves
+use the microcanonical averages <|M|>_E, <M^2>_E, <M^4>_E accumulated during the
+run; with joint=True they are exact canonical sums over g(E, M).
+Members of `influencer_nodes`, if any, are pinned and never flipped.
+"""
+
+import numpy as np
+
+
+def _logsumexp(a):
+    top = np.max(a)
+    return top + np.log(np.sum(np.exp(a - top)))
+
+
+class WangLandau:
+    """Flat-histogram sampler of the density of states of a model."""
+
+    def __init__(self, model, joint=False, bin_width=None, flatness=0.8, log_f_final=1e-8, check_every=100):
+        if not 0 < flatness < 1:
+            raise ValueError("flatness must be between 0 and 1")
+        self.model = model
+        self.joint = joint
+        self.bin_width = bin_width
+        self.flatness = flatness
+        self.log_f_final = log_f_final
+        self.check_every = check_every
+        pinned = getattr(model, "influencer_nodes", ())
+        self._sites = [site for site in model._sites() if site not in pinned]
+        self.length_cycle = 1  # one move() = one sweep of Wang-Landau attempts
+        self.attempts_per_move = len(self._sites)
+        self.log_f = 1.0
+        self.sweeps = 0
+        self.log_g = {}      # level -> log g (up to a constant)
+        self.histogram = {}  # level -> visits since the last reduction of f
+        self._moments = {}   # energy -> [visits, sum |M|, sum M^2, sum M^4]
+        self._level = self._key(model.energy, model.magnetization)
+
+    def _key(self, energy, magnetization):
+        if self.bin_width:
+            energy = self.bin_width * round(energy / self.bin_width)
+        else:
+            energy = round(float(energy), 6)  # discrete levels, up to rounding errors
+        return (energy, int(magnetization)) if self.joint else energy
+
+    def move(self):
+        """One sweep of Wang-Landau attempts at the current f, return the number of flips."""
+        model = self.model
+        log_g, histogram, moments = self.log_g, self.histogram, self._moments
+        log_f = self.log_f
+        level = self._level
+        flipped = 0
+        for i in np.random.randint(len(self._sites), size=len(self._sites)):
+            site = self._sites[i]
+            delta_E = model._flip_rate(model.spins[site], model._local_field(site))[1]
+            new_level = self._key(model.energy + delta_E, model.magnetization - 2 * model.spins[site])
+            diff = log_g.get(level, 0.0) - log_g.get(new_level, 0.0)
+            if diff >= 0 or np.random.random() < np.exp(diff):
+                model._flip_site(site, delta_E)
+                level = new_level
+                flipped += 1
+            log_g[level] = log_g.get(level, 0.0) + log_f
+            histogram[level] = histogram.get(level, 0) + 1
+            if not self.joint:
+                m = abs(model.magnetization)
+                acc = moments.setdefault(level, [0, 0.0, 0.0, 0.0])
+                acc[0] += 1
+                acc[1] += m
+                acc[2] += m**2
+                acc[3] += m**4
+        self._level = level
+        self.sweeps += 1
+        return flipped
+
+    def is_flat(self):
+        """True if every visited level has at least `flatness` times the mean number of visits."""
+        visits = np.fromiter(self.histogram.values(), dtype=float)
+        return len(visits) > 0 and visits.min() >= self.flatness * visits.mean()
+
+    def run(self, max_sweeps=None):
+        """
+        Refine g until log f < log_f_final (or max_sweeps more sweeps); return self.
+        The histogram flatness is checked every `check_every` sweeps.
+        """
+        done = 0
+        while self.log_f >= self.log_f_final and (max_sweeps is None or done < max_sweeps):
+            self.move()
+            done += 1
+            if self.sweeps % self.check_every == 0 and self.is_flat():
+                self.log_f /= 2
+                self.histogram = {}
+        return self
+
+    def log_dos(self):
+        """{level: log g} normalised to the 2^n states of the n free spins."""
+        levels = list(self.log_g)
+        values = np.array([self.log_g[level] for level in levels])
+        values += len(self._sites) * np.log(2) - _logsumexp(values)
+        return dict(zip(levels, values))
+
+    def properties(self, temperatures):
+        """Canonical averages at each temperature, in the results-dict format of compute_properties."""
+        N = len(self.model._sites())
+        dos = self.log_dos()
+        levels = list(dos)
+        log_g = np.array([dos[level] for level in levels])
+        if self.joint:
+            E = np.array([level[0] for level in levels])
+            M = np.abs(np.array([level[1] for level in levels], dtype=float))
+            m1, m2, m4 = M, M**2, M**4
+        else:
+            E = np.array(levels)
+            counts = np.array([self._moments[level][0] for level in levels], dtype=float)
+            m1, m2, m4 = (np.array([self._moments[level][k] for level in levels]) / counts for k in (1, 2, 3))
+
+        results = {'T': list(temperatures), 'M': [], 'E': [], 'chi': [], 'C': [], 'U4': [], 'F': []}
+        for T in temperatures:
+            log_w = log_g - E / T
+            log_Z = _logsumexp(log_w)
+            w = np.exp(log_w - log_Z)
+            av_E, av_E2 = np.dot(w, E), np.dot(w, E**2)
+            av_M, av_M2, av_M4 = np.dot(w, m1), np.dot(w, m2), np.dot(w, m4)
+            results['M'].append(av_M / N)
+            results['E'].append(av_E / N)
+            results['chi'].append((av_M2 - av_M**2) / (N * T))
+            results['C'].append((av_E2 - av_E**2) / (N * T**2))
+            results['U4'].append(1.0 - av_M4 / (3.0 * av_M2**2))
+            results['F'].append(-T * log_Z / N)
+        return results
@@ -0,0 +1,363 @@
+"""
+bench.py
+Benchmark suite for the Monte Carlo kernels and pipelines.
+
+Run from the repository root:
+    python benchmarks/bench.py                      # full suite, prints a table
+    python benchmarks/bench.py --quick              # smaller grid, a few seconds
+    python benchmarks/bench.py --save out.json      # store the measurements
+    python benchmarks/bench.py --compare benchmarks/baseline.json
+    python benchmarks/bench.py --check              # statistical correctness checks only
+
+Every case is seeded and parameterised (L, dim, graph size/density, T far from
+or near Tc). Rates are reported as `*_per_s` (higher is better) and durations as
+`*_s` (lower is better); --compare prints the ratio to a stored baseline and
+flags changes beyond --tolerance. --check validates the engines against the
+Onsager solution of the 2D model, so fast engines are checked as well as timed,
+and checks that interrupted scans on a graph model resume from their checkpoint.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import Ising  # noqa: E402
+from Ising import NormalIsing, GraphIsing, NFoldWay  # noqa: E402
+
+TC = {2: 2.0 / np.log(1 + np.sqrt(2)), 3: 4.5115}
+
+
+# ------------------------------
+# Helpers
+# ------------------------------
+def _temperatures(dim):
+    """A temperature far below Tc (ordered, mostly rejected moves) and one at Tc."""
+    return {"far": round(0.6 * TC[dim], 3), "near": round(TC[dim], 3)}
+
+
+def _timed(fn, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return time.perf_counter() - start
+
+
+def _random_graph(n, p, seed):
+    import networkx as nx
+    return nx.gnp_random_graph(n, p, seed=seed)
+
+
+def onsager_energy(T, J=1.0):
+    """Exact energy per spin of the infinite 2D Ising model at h=0."""
+    from scipy.special import ellipk
+    b = J / T
+    k = 2 * np.sinh(2 * b) / np.cosh(2 * b) ** 2
+    return -J / np.tanh(2 * b) * (1 + 2 / np.pi * (2 * np.tanh(2 * b) ** 2 - 1) * ellipk(k ** 2))
+
+
+def onsager_magnetization(T, J=1.0):
+    """Exact spontaneous magnetization per spin of the 2D Ising model."""
+    if T >= TC[2] * J:
+        return 0.0
+    return (1 - np.sinh(2 * J / T) ** -4) ** 0.125
+
+
+# ------------------------------
+# Benchmark cases
+# ------------------------------
+def bench_lattice(quick, seed):
+    grid = [(2, 16), (3, 8)] if quick else [(2, 16), (2, 64), (3, 8), (3, 16)]
+    sweeps = 2 if quick else 5
+    out = {}
+    for dim, L in grid:
+        N = L ** dim
+        for label, T in _temperatures(dim).items():
+            key = f"lattice/dim={dim}/L={L}/T={label}"
+            np.random.seed(seed)
+            model = NormalIsing(T=T, J=1, L=L, dim=dim)
+            t = _timed(model.metropolis_move, sweeps * N)
+            out[f"{key}/metropolis"] = {"attempts_per_s": sweeps * N / t, "sweeps_per_s": sweeps / t}
+
+            np.random.seed(seed)
+            engine = NFoldWay(NormalIsing(T=T, J=1, L=L, dim=dim))
+            flips = []
+            t = _timed(lambda: flips.append(engine.flip()), sweeps * N // 4)
+            out[f"{key}/nfold"] = {"flips_per_s": len(flips) / t,
+                                   "attempts_per_s": engine.time / t,
+                                   "sweeps_per_s": engine.time / N / t}
+
+            np.random.seed(seed)
+            model = NormalIsing(T=T, J=1, L=L, dim=dim, wolff=True)
+            sizes = []
+
+            def cluster():
+                m = model.magnetization
+                model.move()
+                sizes.append(abs(model.magnetization - m) / 2)
+            n_clusters = 20 if quick else 100
+            t = _timed(cluster, n_clusters)
+            out[f"{key}/wolff"] = {"clusters_per_s": n_clusters / t,
+                                   "mean_cluster_size": float(np.mean(sizes))}
+
+        np.random.seed(seed)
+        model = NormalIsing(T=TC[dim], J=1, L=L, dim=dim)
+        n = 50 if quick else 200
+        out[f"lattice/dim={dim}/L={L}/energy"] = {"evals_per_s": n / _timed(model._get_energy, n)}
+    return out
+
+
+def bench_graph(quick, seed):
+    grid = [(200, 0.05)] if quick else [(200, 0.05), (500, 0.2), (1000, 0.05)]
+    sweeps = 2 if quick else 5
+    out = {}
+    for n, p in grid:
+        G = _random_graph(n, p, seed)
+        Tc = p * (n - 1)  # mean-field estimate: J times the mean degree
+        for label, T in {"far": round(0.6 * Tc, 3), "near": round(Tc, 3)}.items():
+            key = f"graph/n={n}/p={p}/T={label}"
+            for mode, kwargs in [("move", {}), ("local_fields", {"local_fields": True})]:
+                np.random.seed(seed)
+                model = GraphIsing(G, T=T, **kwargs)
+                t = _timed(model.move, sweeps * n)
+                out[f"{key}/{mode}"] = {"attempts_per_s": sweeps * n / t, "sweeps_per_s": sweeps / t}
+
+            np.random.seed(seed)
+            model = GraphIsing(G, T=T, sweep=True)
+            t = _timed(model.move, 5 * sweeps)
+            out[f"{key}/sweep"] = {"attempts_per_s": 5 * sweeps * n / t, "sweeps_per_s": 5 * sweeps / t}
+
+            np.random.seed(seed)
+            engine = NFoldWay(GraphIsing(G, T=T))
+            flips = []
+            t = _timed(lambda: flips.append(engine.flip()), sweeps * n // 4)
+            out[f"{key}/nfold"] = {"flips_per_s": len(flips) / t,
+                                   "attempts_per_s": min(engine.time, 1e300) / t}
+
+        np.random.seed(seed)
+        model = GraphIsing(G)
+        m = 50 if quick else 200
+        out[f"graph/n={n}/p={p}/energy"] = {"evals_per_s": m / _timed(model._get_energy, m)}
+        t = time.perf_counter()
+        GraphIsing(G)
+        out[f"graph/n={n}/p={p}/construct"] = {"build_s": time.perf_counter() - t}
+    return out
+
+
+def _write_students_csv(path, n_students, n_assos, seed):
+    rng = np.random.RandomState(seed)
+    assos = [f"asso{k}" for k in range(n_assos)]
+    with open(path, "w") as f:
+        f.write("name,memberOf\n")
+        for i in range(n_students):
+            member = rng.choice(assos, size=rng.randint(0, 4), replace=False)
+            f.write(f"student{i},{'|'.join(member)}\n")
+    return assos
+
+
+def bench_student_graph(quick, seed):
+    grid = [(300, 10)] if quick else [(300, 10), (2000, 30)]
+    StudentGraph = Ising.StudentGraph  # keep the lazy pandas import out of the timings
+    out = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_students, n_assos in grid:
+            path = Path(tmp) / f"students_{n_students}.csv"
+            assos = _write_students_csv(path, n_students, n_assos, seed)
+            t = time.perf_counter()
+            sg = StudentGraph(str(path), assos)
+            ingest = time.perf_counter() - t
+            t = time.perf_counter()
+            sg.build_graph()
+            build = time.perf_counter() - t
+            out[f"student_graph/n={n_students}/assos={n_assos}"] = {
+                "ingest_s": ingest, "build_s": build,
+                "edges": sg.G.number_of_edges()}
+    return out
+
+
+def bench_import(quick, seed):
+    from import_time import measure
+    return {"import": {"import_s": min(measure()[0] for _ in range(3))}}
+
+
+CASES = {
+    "lattice": bench_lattice,
+    "graph": bench_graph,
+    "student_graph": bench_student_graph,
+    "import": bench_import,
+}
+
+
+# ------------------------------
+# Correctness checks
+# ------------------------------
+def _sample_energy(model, n_warmup, n_cycles):
+    for _ in range(n_warmup * model.length_cycle):
+        model.move()
+    es, ms = [], []
+    for _ in range(n_cycles):
+        for _ in range(model.length_cycle):
+            model.move()
+        obs = model._get_observables()
+        es.append(obs["E"])
+        ms.append(abs(obs["M"]))
+    return np.array(es), np.array(ms)
+
+
+def _error(x, n_blocks=20):
+    """Standard error of the mean from block averages (robust to autocorrelation)."""
+    blocks = np.array_split(x, n_blocks)
+    return np.std([b.mean() for b in blocks], ddof=1) / np.sqrt(n_blocks)
+
+
+def run_checks(quick, seed, n_sigma=4.0):
+    import networkx as nx
+    L = 16
+    N = L * L
+    lattice_graph = nx.convert_node_labels_to_integers(nx.grid_2d_graph(L, L, periodic=True))
+    engines = {
+        "metropolis": lambda T: NormalIsing(T=T, J=1, L=L, dim=2),
+        "wolff": lambda T: NormalIsing(T=T, J=1, L=L, dim=2, wolff=True),
+        "nfold": lambda T: NFoldWay(NormalIsing(T=T, J=1, L=L, dim=2)),
+        "graph_local_fields": lambda T: GraphIsing(lattice_graph, T=T, local_fields=True),
+        "graph_sweep": lambda T: GraphIsing(lattice_graph, T=T, sweep=True),
+    }
+    n_cycles = 400 if quick else 2000
+    ok = True
+    for T in (1.8, 3.0):
+        exact_e = onsager_energy(T)
+        exact_m = onsager_magnetization(T)
+        for name, make in engines.items():
+            np.random.seed(seed)
+            model = make(T)
+            if name != "wolff" and T < TC[2]:
+                model._reset_spin(to_value=1)  # start ordered below Tc
+            n = n_cycles * (20 if name == "wolff" else 1)
+            es, ms = _sample_energy(model, 200, n)
+            e, err = es.mean() / N, _error(es) / N
+            # finite-size correction of the L=16 lattice is below 0.005 at these T
+            passed = abs(e - exact_e) <= n_sigma * err + 0.005
+            line = f"T={T:<4} {name:<20} E/N = {e:+.4f} ± {err:.4f}  (Onsager {exact_e:+.4f})"
+            if T < TC[2]:
+                line += f"  |M|/N = {ms.mean() / N:.4f} (Onsager {exact_m:.4f})"
+            print(("ok   " if passed else "FAIL ") + line)
+            ok &= bool(passed)
+    ok &= run_resume_checks(seed)
+    return ok
+
+
+class _Interrupt(Exception):
+    pass
+
+
+def _interrupted(run):
+    """Call run(callback) with a callback crashing after the first scan point, then resume."""
+    def crash(report):
+        raise _Interrupt
+    try:
+        run(crash)
+    except _Interrupt:
+        pass
+    return run(lambda report: None)
+
+
+def run_resume_checks(seed):
+    """A scan interrupted and resumed from its checkpoint must match an uninterrupted one."""
+    scans = {
+        "compute_properties": lambda G, checkpoint, callback: Ising.compute_properties(
+            GraphIsing(G, T=2.0, local_fields=True), "T", [1.5, 2.5], n_warmup=20, n_cycles=20,
+            checkpoint=checkpoint, callback=callback),
+        "iterations_to_threshold": lambda G, checkpoint, callback: Ising.iterations_to_threshold(
+            GraphIsing, "T", [1.0, 2.0], {"G": G}, iter_per_value=3, max_step=2000, threshold=0.0,
+            checkpoint=checkpoint, callback=callback),
+    }
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, scan in scans.items():
+            np.random.seed(seed)
+            reference = scan(_random_graph(60, 0.1, seed), None, lambda report: None)
+            np.random.seed(seed)
+            path = Path(tmp) / f"{name}.ckpt"
+            # Every call rebuilds the graph, as a new session resuming the run would
+            resumed = _interrupted(lambda callback: scan(_random_graph(60, 0.1, seed),
+                                                         Ising.Checkpoint(path, every=0), callback))
+            passed = repr(resumed) == repr(reference)
+            print(("ok   " if passed else "FAIL ") + f"resume {name} on a graph model")
+            ok &= passed
+    return ok
+
+
+# ------------------------------
+# Reporting
+# ------------------------------
+def compare(current, baseline, tolerance):
+    """Print the ratio of every metric to the baseline, return the regressions."""
+    regressions = []
+    print(f"\n{'case':<55} {'metric':<20} {'baseline':>12} {'current':>12} {'ratio':>7}")
+    for key, metrics in current.items():
+        for metric, value in metrics.items():
+            ref = baseline.get(key, {}).get(metric)
+            if ref is None or not ref:
+                continue
+            ratio = value / ref
+            # rates should not drop, durations should not grow
+            if metric.endswith("_per_s"):
+                worse = ratio < 1 - tolerance
+            elif metric.endswith("_s"):
+                worse = ratio > 1 + tolerance
+            else:
+                worse = False
+            flag = "  REGRESSION" if worse else ""
+            print(f"{key:<55} {metric:<20} {ref:>12.4g} {value:>12.4g} {ratio:>7.2f}{flag}")
+            if worse:
+                regressions.append((key, metric, ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Ising Monte Carlo kernels.")
+    parser.add_argument("--quick", action="store_true", help="smaller parameter grid")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--save", help="write the measurements to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="relative change flagged as regression")
+    parser.add_argument("--check", action="store_true", help="run the correctness checks only")
+    args = parser.parse_args()
+
+    if args.check:
+        return 0 if run_checks(args.quick, args.seed) else 1
+
+    results = {}
+    for name in args.cases:
+        results.update(CASES[name](args.quick, args.seed))
+
+    for key, metrics in results.items():
+        print(f"{key:<55} " + "  ".join(f"{m}={v:.4g}" for m, v in metrics.items()))
+
+    if args.save:
+        payload = {"machine": {"python": platform.python_version(), "platform": platform.platform(),
+                               "numpy": np.__version__},
+                   "quick": args.quick, "seed": args.seed, "results": results}
+        Path(args.save).write_text(json.dumps(payload, indent=1))
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        if baseline.get("quick") != args.quick:
+            print("warning: baseline and current run use different grids (--quick)")
+        regressions = compare(results, baseline["results"], args.tolerance)
+        print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
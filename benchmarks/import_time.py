@@ -0,0 +1,65 @@
+"""
+import_time.py
+Import-time regression check: `import Ising` must only load NumPy.
+
+Run from the repository root:
+    python benchmarks/import_time.py [--budget 1.0] [--repeat 5]
+
+Exits with status 1 if a heavy dependency (plotting, CSV ingestion, fitting,
+progress bars, IPython) is imported eagerly, or if the best import time over
+`repeat` fresh interpreters exceeds `budget` seconds.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+HEAVY = ["matplotlib", "pandas", "plotly", "networkx", "scipy", "tqdm", "IPython"]
+
+PROBE = """
+import json, sys, time
+t = time.perf_counter()
+import Ising
+t = time.perf_counter() - t
+heavy = sorted({name.split('.')[0] for name in sys.modules} & set(json.loads(sys.argv[1])))
+print(json.dumps({'seconds': t, 'heavy': heavy}))
+"""
+
+
+def measure():
+    """Import Ising in a fresh interpreter, return (seconds, heavy modules loaded)."""
+    out = subprocess.run([sys.executable, "-c", PROBE, json.dumps(HEAVY)],
+                         cwd=ROOT, capture_output=True, text=True, check=True)
+    data = json.loads(out.stdout)
+    return data["seconds"], data["heavy"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[2])
+    parser.add_argument("--budget", type=float, default=1.0, help="maximum import time in seconds")
+    parser.add_argument("--repeat", type=int, default=5, help="number of fresh interpreters")
+    args = parser.parse_args()
+
+    runs = [measure() for _ in range(args.repeat)]
+    best = min(seconds for seconds, _ in runs)
+    heavy = sorted(set().union(*(h for _, h in runs)))
+    print(f"import Ising: best {best * 1e3:.1f} ms over {args.repeat} runs")
+
+    failed = False
+    if heavy:
+        print(f"FAIL: heavy modules imported eagerly: {', '.join(heavy)}")
+        failed = True
+    if best > args.budget:
+        print(f"FAIL: import time above budget ({args.budget:.2f} s)")
+        failed = True
+    if not failed:
+        print("OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())